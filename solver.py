@@ -8,26 +8,86 @@ import requests
 import time
 import random
 import math
-from collections import deque
-from dataclasses import dataclass
-from typing import Optional
+import os
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from typing import Optional, Sequence
+import heapq
 import itertools
 
+try:
+    from orjson import loads as json_loads  # Parses bytes directly, several times faster
+except ImportError:
+    from json import loads as json_loads
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    # Numba is optional: without it solve() runs the plain Python BFS
+    HAS_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
 
 # =============================================================================
 # DATA STRUCTURES
 # =============================================================================
 
-@dataclass
+@dataclass(eq=False)  # Identity hash, so states can key the evaluate_walls cache
 class GameState:
     cols: int
     rows: int
-    terrain: list[int]      # 0 = grass, 1 = water
-    walls: list[bool]
-    cherries: list[bool]
+    terrain: bytearray      # 0 = grass, 1 = water
+    walls: bytearray
+    cherries: bytearray
     portals: list[Optional[int]]
     player_idx: int
     budget: int
+    # Derived per puzzle, shared by every state built from the same map
+    cells: Optional[bytearray] = field(default=None, repr=False)  # Static attributes packed per cell
+    candidate_walls: Optional[list[int]] = field(default=None, repr=False)  # Shared by derived states: read-only
+    neighbors: Optional[list[tuple[int, ...]]] = field(default=None, repr=False)
+    edge_mask: Optional[bytearray] = field(default=None, repr=False)
+    reachable: Optional[bytearray] = field(default=None, repr=False)  # Flood with no walls placed
+    # neighbors flattened to CSR (int32) for the compiled kernel
+    adj_indptr: Optional[array] = field(default=None, repr=False)
+    adj_indices: Optional[array] = field(default=None, repr=False)
+    # Packed cell masks, see pack_bits()
+    edge_bits: Optional[int] = field(default=None, repr=False)
+    cherry_bits: Optional[int] = field(default=None, repr=False)
+    # Scratch buffers reused by flood_fill() across calls
+    scratch_seen: Optional[bytearray] = field(default=None, repr=False)
+    scratch_queue: Optional[array] = field(default=None, repr=False)
+    scratch_parent: Optional[array] = field(default=None, repr=False)
+    scratch_walls: Optional[bytearray] = field(default=None, repr=False)  # All zeros between score_walls() calls
+    
+    def __post_init__(self):
+        n = self.cols * self.rows
+        if self.cells is None:
+            self.cells = build_cells(self.terrain, self.cherries, self.portals)
+        if self.candidate_walls is None:
+            self.candidate_walls = find_candidate_walls(self)
+        if self.neighbors is None:
+            self.neighbors = build_neighbors(self.cols, self.rows, self.terrain, self.portals)
+        if self.edge_mask is None:
+            self.edge_mask = build_edge_mask(self.cols, self.rows)
+        if self.reachable is None:
+            self.reachable = build_reachable(self.player_idx, self.neighbors)
+        if self.adj_indptr is None:
+            self.adj_indptr, self.adj_indices = build_csr(self.neighbors)
+        if self.edge_bits is None:
+            self.edge_bits = pack_bits(self.edge_mask)
+        if self.cherry_bits is None:
+            self.cherry_bits = pack_bits(self.cherries)
+        if self.scratch_seen is None:
+            self.scratch_seen = bytearray(n)
+            self.scratch_queue = array('i', bytes(4 * n))
+            self.scratch_parent = array('i', bytes(4 * n))
+            self.scratch_walls = bytearray(n)
 
 
 @dataclass 
@@ -36,9 +96,14 @@ class SolveResult:
     enclosed_area: int
     cherry_bonus: int
     total_score: int
-    visited: set[int]
+    visited_cells: Sequence[int]  # In BFS order
     escaped: bool
     escape_path: list[int]
+    
+    @cached_property
+    def visited(self) -> set[int]:
+        """Built on first use: scoring callers never look at it."""
+        return set(self.visited_cells)
 
 
 @dataclass
@@ -54,90 +119,504 @@ class BenchmarkResult:
 # CORE FUNCTIONS
 # =============================================================================
 
+# Byte -> cell attribute lookup tables, applied to a whole map with bytes.translate()
+TERRAIN_LUT = bytes(1 if b == ord('~') else 0 for b in range(256))
+CHERRY_LUT = bytes(1 if b == ord('C') else 0 for b in range(256))
+PORTAL_CHANNELS: list[Optional[int]] = [
+    int(chr(b), 36) if chr(b) in '0123456789abcdefghijklmnopqrstuvwxyz' else None
+    for b in range(256)
+]
+
+
 def parse_map(map_string: str, budget: int) -> GameState:
     lines = map_string.strip().split('\n')
     rows, cols = len(lines), len(lines[0])
-    terrain, walls, cherries, portals = [], [], [], []
-    player_idx = -1
-    
-    for row in range(rows):
-        for col in range(cols):
-            char = lines[row][col] if col < len(lines[row]) else '.'
-            if char == 'H':
-                player_idx = row * cols + col
-                terrain.append(0); walls.append(False); cherries.append(False); portals.append(None)
-            elif char == 'C':
-                terrain.append(0); walls.append(False); cherries.append(True); portals.append(None)
-            elif char == '~':
-                terrain.append(1); walls.append(False); cherries.append(False); portals.append(None)
-            elif char.isalnum() and char not in 'HCW':
-                channel = ord(char) - ord('0') if '0' <= char <= '9' else ord(char) - ord('a') + 10
-                terrain.append(0); walls.append(False); cherries.append(False); portals.append(channel)
-            else:
-                terrain.append(0); walls.append(False); cherries.append(False); portals.append(None)
+    # Short lines are padded with grass, long ones cut to the first line's width
+    raw = ''.join(line[:cols].ljust(cols, '.') for line in lines).encode('ascii', 'replace')
+    
+    terrain = bytearray(raw.translate(TERRAIN_LUT))
+    cherries = bytearray(raw.translate(CHERRY_LUT))
+    portals = [PORTAL_CHANNELS[b] for b in raw]
+    player_idx = raw.rfind(b'H')
     
-    return GameState(cols, rows, terrain, walls, cherries, portals, player_idx, budget)
+    return GameState(cols, rows, terrain, bytearray(len(raw)), cherries,
+                     portals, player_idx, budget)
 
 
-def solve(state: GameState) -> SolveResult:
-    """BFS flood-fill to check if horse is enclosed."""
-    cols, rows = state.cols, state.rows
-    
+# Bit layout of GameState.cells: walls change per state so they stay in their own array
+CELL_WATER = 0b01
+CELL_CHERRY = 0b10
+CELL_PORTAL_SHIFT = 2  # Upper six bits hold portal channel + 1, 0 = no portal
+
+
+def build_cells(terrain: bytearray, cherries: bytearray, portals: list[Optional[int]]) -> bytearray:
+    """Pack water/cherry/portal into one byte per cell; 0 means plain grass."""
+    cells = bytearray(len(terrain))
+    for idx, ch in enumerate(portals):
+        cell = (CELL_WATER if terrain[idx] == 1 else 0) | (CELL_CHERRY if cherries[idx] else 0)
+        if ch is not None:
+            cell |= (ch + 1) << CELL_PORTAL_SHIFT
+        cells[idx] = cell
+    return cells
+
+
+def build_neighbors(cols: int, rows: int, terrain: bytearray, portals: list[Optional[int]]) -> list[tuple[int, ...]]:
+    """
+    Precompute every cell's moves: in-bounds non-water 4-neighbors, then portal exits.
+    Only walls change during a search, so solve() just has to test those.
+    """
     portal_map = {}
-    for i, ch in enumerate(state.portals):
+    for i, ch in enumerate(portals):
         if ch is not None:
             portal_map.setdefault(ch, []).append(i)
     
-    queue = deque([state.player_idx])
-    visited = {state.player_idx}
-    escaped, escape_cell = False, -1
-    
-    while queue:
-        current = queue.popleft()
-        col, row = current % cols, current // cols
-        
-        if col == 0 or col == cols - 1 or row == 0 or row == rows - 1:
-            if not escaped:
-                escaped, escape_cell = True, current
-        
+    neighbors = []
+    for idx in range(cols * rows):
+        if terrain[idx] == 1:
+            neighbors.append(())
+            continue
+        col, row = idx % cols, idx // cols
+        cells = []
         for dc, dr in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
             nc, nr = col + dc, row + dr
-            if 0 <= nc < cols and 0 <= nr < rows:
-                idx = nr * cols + nc
-                if idx not in visited and not state.walls[idx] and state.terrain[idx] != 1:
-                    visited.add(idx)
-                    queue.append(idx)
-        
-        ch = state.portals[current]
+            if 0 <= nc < cols and 0 <= nr < rows and terrain[nr * cols + nc] != 1:
+                cells.append(nr * cols + nc)
+        ch = portals[idx]
         if ch is not None:
-            for exit_idx in portal_map.get(ch, []):
-                if exit_idx != current and exit_idx not in visited and not state.walls[exit_idx]:
-                    visited.add(exit_idx)
-                    queue.append(exit_idx)
-    
-    if escaped:
-        return SolveResult(sum(state.walls), 0, 0, 0, visited, True, [])
-    
-    cherry_bonus = sum(3 for c in visited if state.cherries[c])
-    return SolveResult(sum(state.walls), len(visited), cherry_bonus, len(visited) + cherry_bonus, visited, False, [])
+            cells.extend(exit_idx for exit_idx in portal_map[ch] if exit_idx != idx)
+        neighbors.append(tuple(cells))
+    return neighbors
+
+
+def build_edge_mask(cols: int, rows: int) -> bytearray:
+    """1 for every border cell - reaching one means the horse escapes."""
+    edge_mask = bytearray(cols * rows)
+    for idx in range(cols * rows):
+        col, row = idx % cols, idx // cols
+        if col == 0 or col == cols - 1 or row == 0 or row == rows - 1:
+            edge_mask[idx] = 1
+    return edge_mask
+
+
+def build_reachable(player_idx: int, neighbors: list[tuple[int, ...]]) -> bytearray:
+    """1 for every cell the horse reaches on the empty map; walls anywhere else are no-ops."""
+    reachable = bytearray(len(neighbors))
+    reachable[player_idx] = 1
+    queue = [player_idx]
+    for current in queue:
+        for idx in neighbors[current]:
+            if not reachable[idx]:
+                reachable[idx] = 1
+                queue.append(idx)
+    return reachable
+
+
+def build_csr(neighbors: list[tuple[int, ...]]) -> tuple[array, array]:
+    """
+    Flatten the neighbor table into CSR form: the moves out of cell i are
+    indices[indptr[i]:indptr[i + 1]], stored contiguously in cell order.
+    """
+    indptr, indices = array('i', [0]), array('i')
+    for cells in neighbors:
+        indices.extend(cells)
+        indptr.append(len(indices))
+    return indptr, indices
+
+
+def pack_bits(mask: bytearray) -> int:
+    """
+    Pack a 0/1-per-cell mask into an int with cell i at bit 8*i.
+    Masks packed this way intersect with one & and count with bit_count().
+    """
+    return int.from_bytes(mask, 'little')
+
+
+@njit(cache=True)
+def flood_fill(adj_indptr, adj_indices, edge_mask, cells, walls, player_idx, seen, queue, parent,
+               need_path, stop_on_escape):
+    """
+    Compiled BFS kernel. Leaves the visited cells in queue[:area] and, if
+    need_path, the BFS tree in parent. Returns (escape_cell, area, cherry_bonus)
+    where escape_cell is the nearest border cell reached, -1 if enclosed.
+    With stop_on_escape the flood ends at that cell, so area is partial.
+    seen is all zeros again on return.
+    """
+    seen[player_idx] = 1
+    queue[0] = player_idx
+    head, tail = 0, 1
+    escape_cell = -1
+    
+    while head < tail:
+        current = queue[head]
+        head += 1
+        
+        # Only an early stop needs the border test per pop; otherwise it
+        # rides along with the cherry pass below
+        if stop_on_escape and edge_mask[current]:
+            escape_cell = current
+            break
+        
+        # Water and off-grid moves are already filtered out of the CSR table
+        for k in range(adj_indptr[current], adj_indptr[current + 1]):
+            idx = adj_indices[k]
+            if not seen[idx] and not walls[idx]:
+                seen[idx] = 1
+                if need_path:
+                    parent[idx] = current
+                queue[tail] = idx
+                tail += 1
+    
+    cherry_bonus = 0
+    for i in range(tail):
+        cell = queue[i]
+        if escape_cell == -1 and edge_mask[cell]:
+            escape_cell = cell  # First in BFS order = nearest
+        if cells[cell] & CELL_CHERRY:
+            cherry_bonus += 3
+        seen[cell] = 0
+    return escape_cell, tail, cherry_bonus
+
+
+@njit(cache=True)
+def score_walls(adj_indptr, adj_indices, edge_mask, cells, walls, wall_cells, player_idx, seen, queue, parent):
+    """
+    Score for wall_cells placed on the empty map, in one compiled call:
+    the walls are set in the (all-zero) walls buffer, flooded, and cleared.
+    """
+    for idx in wall_cells:
+        walls[idx] = 1
+    escape_cell, area, cherry_bonus = flood_fill(
+        adj_indptr, adj_indices, edge_mask, cells, walls, player_idx, seen, queue, parent, False, True)
+    for idx in wall_cells:
+        walls[idx] = 0
+    return 0 if escape_cell != -1 else area + cherry_bonus
+
+
+@njit(cache=True, nogil=True)
+def score_wall_sets(adj_indptr, adj_indices, edge_mask, cells, player_idx, wall_indptr, wall_cells,
+                    scores, first, step, walls, seen, queue, parent):
+    """
+    score_walls() for sets first, first + step, ... of a CSR-style batch, where
+    set i is wall_cells[wall_indptr[i]:wall_indptr[i + 1]]. Releases the GIL,
+    so threads with their own scratch buffers can score one batch in parallel.
+    """
+    for i in range(first, len(wall_indptr) - 1, step):
+        for k in range(wall_indptr[i], wall_indptr[i + 1]):
+            walls[wall_cells[k]] = 1
+        escape_cell, area, cherry_bonus = flood_fill(
+            adj_indptr, adj_indices, edge_mask, cells, walls, player_idx, seen, queue, parent, False, True)
+        for k in range(wall_indptr[i], wall_indptr[i + 1]):
+            walls[wall_cells[k]] = 0
+        scores[i] = 0 if escape_cell != -1 else area + cherry_bonus
+
+
+@njit(cache=True, nogil=True)
+def single_wall_floods(adj_indptr, adj_indices, edge_mask, cells, walls, player_idx, wall_cells, areas,
+                       seen, queue, parent):
+    """areas[i] = full flood area with only wall_cells[i] placed, or -1 if it encloses."""
+    for i in range(len(wall_cells)):
+        walls[wall_cells[i]] = 1
+        escape_cell, area, cherry_bonus = flood_fill(
+            adj_indptr, adj_indices, edge_mask, cells, walls, player_idx, seen, queue, parent, False, False)
+        walls[wall_cells[i]] = 0
+        areas[i] = area if escape_cell != -1 else -1
+
+
+@njit(cache=True, nogil=True)
+def random_search_loop(adj_indptr, adj_indices, edge_mask, cells, player_idx, pool, num_walls, iterations,
+                       seed, best_walls, walls, seen, queue, parent):
+    """
+    random_search(), compiled: draws each set with a partial Fisher-Yates over
+    pool (shuffled in place) and scores it. Writes the best set to best_walls
+    and returns its score, 0 if nothing enclosed. walls must be all zeros on
+    entry and is again on return.
+    """
+    random.seed(seed)
+    n = len(pool)
+    best_score = 0
+    for _ in range(iterations):
+        for i in range(num_walls):
+            j = i + random.randrange(n - i)
+            pool[i], pool[j] = pool[j], pool[i]
+            walls[pool[i]] = 1
+        escape_cell, area, cherry_bonus = flood_fill(
+            adj_indptr, adj_indices, edge_mask, cells, walls, player_idx, seen, queue, parent, False, True)
+        for i in range(num_walls):
+            walls[pool[i]] = 0
+        if escape_cell == -1 and area + cherry_bonus > best_score:
+            best_score = area + cherry_bonus
+            for i in range(num_walls):
+                best_walls[i] = pool[i]
+    return best_score
+
+
+@njit(cache=True)
+def sa_swap_loop(adj_indptr, adj_indices, edge_mask, cells, player_idx, candidates, walls, best_walls,
+                 current_score, best_score, temp, cooling, iterations, seed,
+                 scratch_walls, region, region_cells, seen, queue, parent):
+    """
+    Single-swap SA, compiled: each step moves a random wall to a random free
+    candidate, rescores and keeps it by the Metropolis rule. walls and
+    best_walls are updated in place; returns (current_score, best_score, temp)
+    so callers can resume. scratch_walls and region must be all zeros on entry
+    and are again on return.
+    
+    Moves that can't change the flood skip the BFS: region flags the cells
+    seen by the current walls' flood, and a new wall outside it plus a freed
+    cell with no neighbor in it leave that flood, and the score, unchanged.
+    """
+    random.seed(seed)
+    num_walls, num_candidates = len(walls), len(candidates)
+    if num_walls == 0 or num_candidates <= num_walls:
+        return current_score, best_score, temp * cooling ** iterations  # No swap to make
+    
+    # scratch_walls mirrors walls for the whole loop, so it doubles as the taken-cell flags
+    for i in range(num_walls):
+        scratch_walls[walls[i]] = 1
+    escape_cell, area, cherry_bonus = flood_fill(
+        adj_indptr, adj_indices, edge_mask, cells, scratch_walls, player_idx, seen, queue, parent, False, True)
+    region_size = area
+    for i in range(area):
+        region_cells[i] = queue[i]
+        region[queue[i]] = 1
+    
+    for _ in range(iterations):
+        temp *= cooling
+        
+        added = candidates[random.randrange(num_candidates)]
+        while scratch_walls[added]:
+            added = candidates[random.randrange(num_candidates)]
+        slot = random.randrange(num_walls)
+        removed = walls[slot]
+        
+        unchanged = not region[added]
+        if unchanged:
+            for k in range(adj_indptr[removed], adj_indptr[removed + 1]):
+                if region[adj_indices[k]]:
+                    unchanged = False
+                    break
+        
+        scratch_walls[removed] = 0
+        scratch_walls[added] = 1
+        if unchanged:
+            new_score = current_score
+        else:
+            escape_cell, area, cherry_bonus = flood_fill(
+                adj_indptr, adj_indices, edge_mask, cells, scratch_walls, player_idx, seen, queue, parent, False, True)
+            new_score = 0 if escape_cell != -1 else area + cherry_bonus
+        delta = new_score - current_score
+        
+        if delta > 0 or random.random() < math.exp(delta / max(temp, 0.001)):
+            walls[slot] = added
+            current_score = new_score
+            if not unchanged:
+                for i in range(region_size):
+                    region[region_cells[i]] = 0
+                for i in range(area):
+                    region_cells[i] = queue[i]
+                    region[queue[i]] = 1
+                region_size = area
+            if current_score > best_score:
+                best_score = current_score
+                for i in range(num_walls):
+                    best_walls[i] = walls[i]
+        else:
+            scratch_walls[removed] = 1
+            scratch_walls[added] = 0
+    
+    for i in range(num_walls):
+        scratch_walls[walls[i]] = 0
+    for i in range(region_size):
+        region[region_cells[i]] = 0
+    return current_score, best_score, temp
+
+
+def trace_path(parent, player_idx: int, cell: int) -> list[int]:
+    """Follow BFS parent links from cell back to the horse; returns horse -> cell."""
+    path = []
+    while cell != player_idx:
+        path.append(cell)
+        cell = parent[cell]
+    path.append(player_idx)
+    path.reverse()  # append + reverse: insert(0, ...) would make this quadratic
+    return path
+
+
+def solve(state: GameState, *, score_to_beat: Optional[int] = None, need_path: bool = False) -> SolveResult:
+    """
+    BFS flood-fill to check if horse is enclosed.
+    escape_path is only traced when need_path is set; scoring never reads it.
+    With score_to_beat, the flood stops as soon as the horse escapes: the score
+    (0) can't beat it, and total_score stays exact but visited is partial.
+    """
+    stop_on_escape = score_to_beat is not None and score_to_beat >= 0
+    if HAS_NUMBA:
+        escape_cell, area, cherry_bonus = flood_fill(
+            state.adj_indptr, state.adj_indices, state.edge_mask, state.cells, state.walls,
+            state.player_idx, state.scratch_seen, state.scratch_queue, state.scratch_parent, need_path, stop_on_escape)
+        visited = state.scratch_queue[:area]  # Copy out: the scratch is reused next call
+        if escape_cell != -1:
+            escape_path = trace_path(state.scratch_parent, state.player_idx, escape_cell) if need_path else []
+            return SolveResult(state.walls.count(1), 0, 0, 0, visited, True, escape_path)
+        return SolveResult(state.walls.count(1), area, cherry_bonus, area + cherry_bonus, visited, False, [])
+    
+    if need_path:
+        walls, neighbors = state.walls, state.neighbors
+        seen = bytearray(len(walls))
+        seen[state.player_idx] = 1
+        queue = [state.player_idx]
+        parent = {}
+        for current in queue:
+            for idx in neighbors[current]:
+                if not walls[idx] and not seen[idx]:
+                    seen[idx] = 1
+                    parent[idx] = current
+                    queue.append(idx)
+    else:
+        seen, queue = python_flood(state, stop_on_escape)
+    
+    # Border and cherry checks run once on the packed mask instead of per cell
+    visited_bits = pack_bits(seen)
+    if visited_bits & state.edge_bits:
+        escape_path = []
+        if need_path:
+            edge_mask = state.edge_mask
+            escape_cell = next(c for c in queue if edge_mask[c])  # First in BFS order = nearest
+            escape_path = trace_path(parent, state.player_idx, escape_cell)
+        return SolveResult(state.walls.count(1), 0, 0, 0, queue, True, escape_path)
+    
+    cherry_bonus = 3 * (visited_bits & state.cherry_bits).bit_count()
+    return SolveResult(state.walls.count(1), len(queue), cherry_bonus, len(queue) + cherry_bonus, queue, False, [])
+
+
+def python_flood(state: GameState, stop_on_escape: bool) -> tuple[bytearray, list[int]]:
+    """Plain BFS behind solve() without numba: (seen mask, visited cells in BFS order)."""
+    walls, neighbors = state.walls, state.neighbors
+    
+    seen = bytearray(len(walls))
+    seen[state.player_idx] = 1
+    queue = [state.player_idx]  # Grows while iterated; ends up holding every visited cell
+    
+    if stop_on_escape:
+        edge_mask = state.edge_mask
+        for current in queue:
+            if edge_mask[current]:
+                break
+            for idx in neighbors[current]:
+                if not walls[idx] and not seen[idx]:
+                    seen[idx] = 1
+                    queue.append(idx)
+    else:
+        for current in queue:
+            for idx in neighbors[current]:
+                if not walls[idx] and not seen[idx]:
+                    seen[idx] = 1
+                    queue.append(idx)
+    return seen, queue
+
+
+def solve_score_only(state: GameState, *, score_to_beat: Optional[int] = None) -> tuple[bool, int, int]:
+    """
+    solve() for callers that only read the numbers: returns (escaped,
+    visited_count, total_score) with no SolveResult, wall count or copy of
+    the visited cells. score_to_beat stops the flood early as in solve().
+    """
+    stop_on_escape = score_to_beat is not None and score_to_beat >= 0
+    if HAS_NUMBA:
+        escape_cell, area, cherry_bonus = flood_fill(
+            state.adj_indptr, state.adj_indices, state.edge_mask, state.cells, state.walls,
+            state.player_idx, state.scratch_seen, state.scratch_queue, state.scratch_parent, False, stop_on_escape)
+        if escape_cell != -1:
+            return True, area, 0
+        return False, area, area + cherry_bonus
+    
+    seen, queue = python_flood(state, stop_on_escape)
+    visited_bits = pack_bits(seen)
+    if visited_bits & state.edge_bits:
+        return True, len(queue), 0
+    area = len(queue)
+    return False, area, area + 3 * (visited_bits & state.cherry_bits).bit_count()
 
 
 def make_state_with_walls(base: GameState, wall_indices: list[int]) -> GameState:
-    new_walls = [False] * len(base.walls)
+    new_walls = bytearray(len(base.walls))
     for idx in wall_indices:
-        new_walls[idx] = True
-    return GameState(base.cols, base.rows, base.terrain, new_walls, 
-                     base.cherries, base.portals, base.player_idx, base.budget)
+        new_walls[idx] = 1
+    # Shallow clone: every other field is per-puzzle and shared with base.
+    # Skips dataclasses.replace(), whose __init__/__post_init__ round trip costs
+    # more than the bytearray itself.
+    state = object.__new__(GameState)
+    state.__dict__.update(base.__dict__)
+    state.walls = new_walls
+    return state
 
 
 def find_candidate_walls(state: GameState) -> list[int]:
-    return [idx for idx in range(len(state.terrain))
-            if state.terrain[idx] == 0 and idx != state.player_idx 
-            and not state.cherries[idx] and state.portals[idx] is None]
+    # Plain grass only: no water, cherry or portal bits set
+    cells = state.cells
+    return [idx for idx in range(len(cells)) if not cells[idx] and idx != state.player_idx]
 
 
 def evaluate_walls(state: GameState, walls: list[int]) -> int:
-    return solve(make_state_with_walls(state, walls)).total_score
+    # Key on the effective walls only: sets that differ just by walls the horse
+    # can never reach score the same and share one cache entry
+    reachable = state.reachable
+    return evaluate_walls_cached(state, tuple(sorted(w for w in walls if reachable[w])))
+
+
+@lru_cache(maxsize=200_000)
+def evaluate_walls_cached(state: GameState, walls_key: tuple[int, ...]) -> int:
+    """Memoized score per wall set; GA elites and SA revisits skip their BFS."""
+    if HAS_NUMBA:
+        # No state clone or SolveResult: the kernel only needs the wall cells
+        return score_walls(state.adj_indptr, state.adj_indices, state.edge_mask, state.cells,
+                           state.scratch_walls, array('i', walls_key), state.player_idx,
+                           state.scratch_seen, state.scratch_queue, state.scratch_parent)
+    return solve_score_only(make_state_with_walls(state, walls_key), score_to_beat=0)[2]
+
+
+def evaluate_population(state: GameState, population: list[list[int]]) -> list[int]:
+    """
+    Scores for a whole GA generation. With numba the batch goes through
+    score_wall_sets() on every core at once; without it this falls back to
+    evaluate_walls (and its cache) per individual.
+    """
+    if not HAS_NUMBA or not population:
+        return [evaluate_walls(state, ind) for ind in population]
+    
+    n = len(state.cells)
+    wall_indptr = array('i', [0])
+    wall_indptr.extend(itertools.accumulate(map(len, population)))
+    wall_cells = array('i', itertools.chain.from_iterable(population))
+    scores = array('i', bytes(4 * len(population)))
+    
+    def score_slice(first: int, step: int):
+        score_wall_sets(state.adj_indptr, state.adj_indices, state.edge_mask, state.cells, state.player_idx,
+                        wall_indptr, wall_cells, scores, first, step,
+                        bytearray(n), bytearray(n), array('i', bytes(4 * n)), array('i', bytes(4 * n)))
+    
+    pool = _get_thread_pool()
+    if pool is None:
+        score_slice(0, 1)
+    else:
+        step = os.cpu_count()
+        list(pool.map(score_slice, range(step), itertools.repeat(step)))
+    return scores.tolist()
+
+
+# Threads for evaluate_population(); created on first use, main process only
+_thread_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_thread_pool() -> Optional[ThreadPoolExecutor]:
+    global _thread_pool
+    threads = os.cpu_count() or 1
+    # Process-pool workers already fill every core: they score serially
+    if threads == 1 or _worker_state is not None:
+        return None
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(threads)
+    return _thread_pool
 
 
 def evaluate_wall_swap(state: GameState, current_walls: list[int], remove_idx: int, add_idx: int) -> tuple[int, int]:
@@ -185,13 +664,90 @@ def get_cherry_neighbors(state: GameState, candidates: list[int], max_dist: int
     return cherry_neighbors
 
 
+def random_wall_sets(candidates: Sequence[int], num_walls: int, count: int) -> list[list[int]]:
+    """
+    count random wall sets drawn in one go: a partial Fisher-Yates over one
+    shared pool instead of a random.sample() call, and candidate copy, per set.
+    """
+    pool = list(candidates)
+    n = len(pool)
+    rand = random.random
+    wall_sets = []
+    for _ in range(count):
+        for i in range(num_walls):
+            j = i + int(rand() * (n - i))
+            pool[i], pool[j] = pool[j], pool[i]
+        wall_sets.append(pool[:num_walls])
+    return wall_sets
+
+
+# GA stagnation, in generations without a new best: a burst of immigrants
+# replaces half the population at GA_BURST_GENS, and the GA stops at
+# GA_STOP_GENS once it has enclosed anything at all
+GA_BURST_GENS = 100
+GA_STOP_GENS = 200
+
+
+def _tournament(scored: list[tuple[int, list[int]]], k: int) -> list[int]:
+    """Individual with the best score among k random draws from scored; allocates nothing."""
+    n = len(scored)
+    best_score, best_ind = scored[random.randrange(n)]
+    for _ in range(k - 1):
+        score, ind = scored[random.randrange(n)]
+        if score > best_score:
+            best_score, best_ind = score, ind
+    return best_ind
+
+
+def crossover_walls(p1: list[int], p2: list[int], candidates: Sequence[int], num_walls: int) -> list[int]:
+    """
+    Child of half of each parent's walls (shared walls once), topped up with
+    free candidates or trimmed back down to num_walls.
+    """
+    child = random.sample(p1, len(p1) // 2)
+    taken = set(child)
+    for w in random.sample(p2, len(p2) // 2):
+        if w not in taken:
+            taken.add(w)
+            child.append(w)
+    while len(child) < num_walls:
+        w = pick_free_candidate(candidates, child)
+        if w is None:
+            break
+        child.append(w)
+    if len(child) > num_walls:
+        child = random.sample(child, num_walls)
+    return child
+
+
+def pick_free_candidate(pool: Sequence[int], taken: Sequence[int]) -> Optional[int]:
+    """
+    Uniform random cell from pool that isn't in taken, None if there is none.
+    taken is a handful of walls against a pool of ~100 cells, so a few
+    rejection draws beat rebuilding the 'available' list on every move.
+    """
+    if pool:
+        for _ in range(8):
+            cell = random.choice(pool)
+            if cell not in taken:
+                return cell
+    free = [c for c in pool if c not in taken]
+    return random.choice(free) if free else None
+
+
+# Shared so fetching several dates reuses one keep-alive connection
+session = requests.Session()
+
+
 def fetch_daily_puzzle(date: str) -> dict:
-    response = requests.get(f"https://enclose.horse/api/daily/{date}")
+    response = session.get(f"https://enclose.horse/api/daily/{date}")
     response.raise_for_status()
-    return response.json()
+    return json_loads(response.content)
 
 
 def visualize_state(state: GameState, result: Optional[SolveResult] = None) -> str:
+    """Render the grid; pass a solve(..., need_path=True) result to also draw the escape route."""
+    escape_path = set(result.escape_path) if result else set()
     lines = []
     for row in range(state.rows):
         line = ""
@@ -204,6 +760,7 @@ def visualize_state(state: GameState, result: Optional[SolveResult] = None) -> s
             elif state.portals[idx] is not None:
                 ch = state.portals[idx]
                 line += chr(ord('0') + ch) if ch < 10 else chr(ord('a') + ch - 10)
+            elif idx in escape_path: line += "*"
             elif result and idx in result.visited: line += "·"
             else: line += "."
         lines.append(line)
@@ -214,18 +771,23 @@ def visualize_state(state: GameState, result: Optional[SolveResult] = None) -> s
 # SMART SOLVERS
 # =============================================================================
 
-def find_escape_path_cells(state: GameState, current_walls: list[int]) -> set[int]:
-    """Find all cells that are on ANY escape path from horse to edge."""
-    test_state = make_state_with_walls(state, current_walls)
-    result = solve(test_state)
+def find_escape_path_cells(state: GameState, current_walls: list[int],
+                           result: Optional[SolveResult] = None) -> set[int]:
+    """
+    Find all cells that are on ANY escape path from horse to edge.
+    Pass the flood for current_walls as `result` if it has already been run.
+    """
+    if result is None:
+        result = solve(make_state_with_walls(state, current_walls))
     
     if not result.escaped:
         return set()  # Already enclosed
     
     # All visited cells are potential escape route cells
-    # But we only care about ones that could be walls
-    candidates = set(find_candidate_walls(state))
-    return result.visited & candidates
+    # But we only care about ones that could be walls: plain grass other than
+    # the horse (see find_candidate_walls), read straight off the cell bytes
+    cells, player_idx = state.cells, state.player_idx
+    return {c for c in result.visited_cells if not cells[c] and c != player_idx}
 
 
 def solve_smart_exhaustive(state: GameState, timeout: float = 120.0) -> BenchmarkResult:
@@ -237,7 +799,9 @@ def solve_smart_exhaustive(state: GameState, timeout: float = 120.0) -> Benchmar
     This dramatically prunes the search space.
     """
     start = time.time()
-    candidates = find_candidate_walls(state)
+    candidates = state.candidate_walls
+    cand_index = {c: i for i, c in enumerate(candidates)}  # Position lookup without list.index()
+    cherries, edge_mask = state.cherries, state.edge_mask
     best_score, best_walls = 0, []
     iterations = 0
     
@@ -249,8 +813,9 @@ def solve_smart_exhaustive(state: GameState, timeout: float = 120.0) -> Benchmar
         
         iterations += 1
         
-        # Evaluate current state
-        score = evaluate_walls(state, current_walls)
+        # Evaluate current state - one flood gives both the score and the escape cells
+        result = solve(make_state_with_walls(state, current_walls))
+        score = result.total_score
         if score > best_score:
             best_score = score
             best_walls = current_walls.copy()
@@ -259,19 +824,24 @@ def solve_smart_exhaustive(state: GameState, timeout: float = 120.0) -> Benchmar
         if remaining_budget == 0:
             return
         
+        # More walls only shrink the flood, so any enclosure reachable from here
+        # lies inside its non-edge cells; prune when even all of those can't win
+        if result.escaped and sum(1 + 3 * cherries[c] for c in result.visited_cells if not edge_mask[c]) <= best_score:
+            return
+        
         # Find cells on escape paths (only these are worth placing walls on)
-        escape_cells = find_escape_path_cells(state, current_walls)
+        escape_cells = find_escape_path_cells(state, current_walls, result)
         if not escape_cells:
             return  # Already enclosed, no need for more walls
         
-        # Only consider candidates that are on escape paths AND haven't been tried
-        useful_candidates = [c for c in candidates[start_idx:] if c in escape_cells]
+        # Only consider candidates that are on escape paths AND haven't been tried,
+        # in candidate order; escape_cells only holds candidates, so no scan needed
+        useful_candidates = sorted((c for c in escape_cells if cand_index[c] >= start_idx), key=cand_index.__getitem__)
         
-        for i, wall in enumerate(useful_candidates):
+        for wall in useful_candidates:
             new_walls = current_walls + [wall]
-            # Find the index in original candidates to avoid duplicates
-            next_start = candidates.index(wall) + 1 if wall in candidates else start_idx
-            search(new_walls, remaining_budget - 1, next_start)
+            # Continue after this wall's candidate position to avoid duplicates
+            search(new_walls, remaining_budget - 1, cand_index[wall] + 1)
     
     search([], state.budget, 0)
     
@@ -284,7 +854,7 @@ def solve_genetic_massive(state: GameState, pop_size: int = 250, generations: in
     Optimized: plateaus around gen 2000-3000, so 3500 is sufficient.
     """
     start = time.time()
-    candidates = find_candidate_walls(state)
+    candidates = state.candidate_walls
     num_walls = min(state.budget, len(candidates))
     
     if not candidates:
@@ -296,49 +866,32 @@ def solve_genetic_massive(state: GameState, pop_size: int = 250, generations: in
     for neighbors in cherry_neighbors.values():
         all_cherry_candidates.update(neighbors)
     
-    def random_individual():
-        return random.sample(candidates, num_walls)
+    cherry_pool = list(all_cherry_candidates)
     
     def mutate(ind, swaps=1):
-        ind = ind.copy()
+        # In place: only ever applied to a fresh crossover child
         for _ in range(swaps):
-            available = [c for c in candidates if c not in ind]
-            if available and ind:
-                # Cherry-aware mutation: 30% chance to try cherry-adjacent positions
-                if random.random() < 0.3 and all_cherry_candidates:
-                    cherry_candidates = [c for c in available if c in all_cherry_candidates]
-                    if cherry_candidates:
-                        ind.pop(random.randrange(len(ind)))
-                        ind.append(random.choice(cherry_candidates))
-                    else:
-                        ind.pop(random.randrange(len(ind)))
-                        ind.append(random.choice(available))
-                else:
-                    ind.pop(random.randrange(len(ind)))
-                    ind.append(random.choice(available))
+            # Cherry-aware mutation: 30% chance to try cherry-adjacent positions
+            w = None
+            if random.random() < 0.3 and cherry_pool:
+                w = pick_free_candidate(cherry_pool, ind)
+            if w is None:
+                w = pick_free_candidate(candidates, ind)
+            if w is not None and ind:
+                ind.pop(random.randrange(len(ind)))
+                ind.append(w)
         return ind
     
-    def crossover(p1, p2):
-        child = list(set(random.sample(p1, len(p1)//2) + random.sample(p2, len(p2)//2)))
-        while len(child) < num_walls:
-            available = [c for c in candidates if c not in child]
-            if available:
-                child.append(random.choice(available))
-            else:
-                break
-        if len(child) > num_walls:
-            child = random.sample(child, num_walls)
-        return child
-    
-    population = [random_individual() for _ in range(pop_size)]
+    population = random_wall_sets(candidates, num_walls, pop_size)
     best_score, best_walls = 0, []
     iterations = 0
+    stale_gens = 0
     
     for gen in range(generations):
+        gen_start_best = best_score
         scored = []
-        for ind in population:
+        for score, ind in zip(evaluate_population(state, population), population):
             iterations += 1
-            score = evaluate_walls(state, ind)
             scored.append((score, ind))
             if score > best_score:
                 best_score = score
@@ -346,41 +899,101 @@ def solve_genetic_massive(state: GameState, pop_size: int = 250, generations: in
                 if gen % 100 == 0 or score > best_score - 1:
                     print(f"    [Genetic] Gen {gen}: New best = {best_score}")
         
-        scored.sort(key=lambda x: x[0], reverse=True)
-        
-        # Elitism: keep top 5%
-        elite = [ind.copy() for _, ind in scored[:max(1, pop_size // 20)]]
+        if best_score > gen_start_best:
+            stale_gens = 0
+        else:
+            stale_gens += 1
+            if best_score and stale_gens >= GA_STOP_GENS:
+                break
         
-        new_pop = elite.copy()
+        # Elitism: keep top 5% - a partial selection, tournaments don't need scored sorted
+        # Scored individuals are never modified in place, so elites carry over uncopied
+        new_pop = [ind for _, ind in heapq.nlargest(max(1, pop_size // 20), scored, key=lambda x: x[0])]
         while len(new_pop) < pop_size:
             # Tournament
-            t1 = random.sample(scored, min(7, len(scored)))
-            p1 = max(t1, key=lambda x: x[0])[1]
-            t2 = random.sample(scored, min(7, len(scored)))
-            p2 = max(t2, key=lambda x: x[0])[1]
+            p1 = _tournament(scored, 7)
+            p2 = _tournament(scored, 7)
             
-            child = crossover(p1, p2)
+            child = crossover_walls(p1, p2, candidates, num_walls)
             if random.random() < 0.6:
                 child = mutate(child, random.randint(1, 3))
             new_pop.append(child)
         
-        # 10% immigrants
-        for i in range(pop_size // 10):
-            new_pop[-(i+1)] = random_individual()
+        # 10% immigrants, half the population on a stagnation burst
+        immigrants = pop_size // 2 if stale_gens == GA_BURST_GENS else pop_size // 10
+        new_pop[len(new_pop) - immigrants:] = random_wall_sets(candidates, num_walls, immigrants)
         
         population = new_pop
     
     return BenchmarkResult("Genetic 5K gen", best_score, best_walls, time.time() - start, iterations)
 
 
-def solve_sa_massive(state: GameState, total_iterations: int = 1200000) -> BenchmarkResult:
+def sa_restart(state: GameState, cherry_pool: list[int], iterations: int) -> tuple[int, list[int]]:
+    """One cherry-aware SA run from a random start; see solve_sa_massive."""
+    candidates = state.candidate_walls
+    num_walls = min(state.budget, len(candidates))
+    
+    current_walls = random.sample(candidates, num_walls)
+    current_score = evaluate_walls(state, current_walls)
+    best_score, best_walls = current_score, current_walls.copy()
+    
+    temp = 100.0
+    cooling = 1 - (4.0 / iterations)
+    
+    # Local aliases: this loop runs hundreds of thousands of times
+    _rand, _randrange, _exp = random.random, random.randrange, math.exp
+    # One draw picks the move: below cherry_cut a cherry-aware swap (40% when
+    # there are cherries), then one or two normal swaps split 70/30
+    cherry_cut = 0.4 if cherry_pool else 0.0
+    single_cut = cherry_cut + 0.7 * (1 - cherry_cut)
+    
+    for i in range(iterations):
+        temp *= cooling
+        
+        new_walls = current_walls.copy()
+        
+        # Cherry-aware swap: 40% chance to try cherry-adjacent positions
+        move = _rand()
+        if new_walls and move < cherry_cut:
+            # Remove a random wall, add cherry-adjacent one
+            w = pick_free_candidate(cherry_pool, new_walls)
+            if w is None:
+                # Fallback to normal swap
+                w = pick_free_candidate(candidates, new_walls)
+            if w is not None:
+                new_walls.pop(_randrange(len(new_walls)))
+                new_walls.append(w)
+        else:
+            # Normal swap
+            swaps = 1 if move < single_cut else 2
+            for _ in range(swaps):
+                w = pick_free_candidate(candidates, new_walls)
+                if w is not None and new_walls:
+                    new_walls.pop(_randrange(len(new_walls)))
+                    new_walls.append(w)
+        
+        new_score = evaluate_walls(state, new_walls)
+        delta = new_score - current_score
+        
+        if delta > 0 or (temp > 0.001 and _rand() < _exp(delta / temp)):
+            current_walls = new_walls
+            current_score = new_score
+            if current_score > best_score:
+                best_score = current_score
+                best_walls = current_walls.copy()
+    
+    return best_score, best_walls
+
+
+def solve_sa_massive(state: GameState, total_iterations: int = 1200000,
+                     workers: Optional[int] = None) -> BenchmarkResult:
     """
     SA with cherry-aware swaps.
     Optimized: improvements in first few restarts, so 6 restarts × 200K = 1.2M total.
+    The restarts are independent, so they run side by side on a process pool.
     """
     start = time.time()
-    candidates = find_candidate_walls(state)
-    num_walls = min(state.budget, len(candidates))
+    candidates = state.candidate_walls
     
     if not candidates:
         return BenchmarkResult("SA", 0, [], time.time() - start, 0)
@@ -390,85 +1003,168 @@ def solve_sa_massive(state: GameState, total_iterations: int = 1200000) -> Bench
     all_cherry_candidates = set()
     for neighbors in cherry_neighbors.values():
         all_cherry_candidates.update(neighbors)
+    cherry_pool = list(all_cherry_candidates)
     
     best_score, best_walls = 0, []
     num_restarts = 6  # Optimized: most improvements in first few restarts
     iters_per_restart = total_iterations // num_restarts
     
-    for restart in range(num_restarts):
-        current_walls = random.sample(candidates, num_walls)
-        current_score = evaluate_walls(state, current_walls)
+    tasks = [(sa_restart, (cherry_pool, iters_per_restart), random.getrandbits(64))
+             for _ in range(num_restarts)]
+    workers = min(workers or os.cpu_count() or 1, num_restarts)
+    
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(state,)) as pool:
+        for restart, (score, walls) in enumerate(pool.map(_seeded_worker, tasks)):
+            if score > best_score:
+                best_score = score
+                best_walls = walls
+            
+            if restart % 2 == 0:
+                print(f"    [SA] Restart {restart+1}/{num_restarts}: Best = {best_score}")
+    
+    return BenchmarkResult("SA", best_score, best_walls, time.time() - start, total_iterations)
+
+
+def sa_polish(state: GameState, walls: list[int], score: int, temp: float, cooling: float,
+              iterations: int, deadline: Optional[float] = None) -> tuple[int, list[int], int]:
+    """
+    Single-swap SA from walls (which score `score`), used to polish GA results.
+    Returns (best_score, best_walls, iterations_run), stopping early at deadline.
+    """
+    candidates = state.candidate_walls
+    
+    if HAS_NUMBA:
+        # The whole loop runs compiled, in slices so the deadline is still honoured
+        n = len(state.cells)
+        current_walls, best_walls = array('i', walls), array('i', walls)
+        region, region_cells = bytearray(n), array('i', bytes(4 * n))
+        candidate_array = array('i', candidates)
+        best_score, done = score, 0
+        while done < iterations and (deadline is None or time.time() < deadline):
+            steps = min(10_000, iterations - done)
+            score, best_score, temp = sa_swap_loop(
+                state.adj_indptr, state.adj_indices, state.edge_mask, state.cells, state.player_idx,
+                candidate_array, current_walls, best_walls, score, best_score, temp, cooling, steps,
+                random.getrandbits(32), state.scratch_walls, region, region_cells,
+                state.scratch_seen, state.scratch_queue, state.scratch_parent)
+            done += steps
+        return best_score, best_walls.tolist(), done
+    
+    current_walls, current_score = walls.copy(), score
+    best_score, best_walls = score, walls.copy()
+    _rand, _randrange, _exp, _time = random.random, random.randrange, math.exp, time.time
+    
+    for i in range(iterations):
+        if deadline is not None and _time() > deadline:
+            return best_score, best_walls, i
+        temp *= cooling
         
-        if current_score > best_score:
-            best_score = current_score
-            best_walls = current_walls.copy()
+        new_walls = current_walls.copy()
+        w = pick_free_candidate(candidates, new_walls)
         
-        temp = 100.0
-        cooling = 1 - (4.0 / iters_per_restart)
+        if w is not None and new_walls:
+            new_walls.pop(_randrange(len(new_walls)))
+            new_walls.append(w)
         
-        for i in range(iters_per_restart):
-            temp *= cooling
-            
-            new_walls = current_walls.copy()
-            available = [c for c in candidates if c not in new_walls]
-            
-            # Cherry-aware swap: 40% chance to try cherry-adjacent positions
-            if available and new_walls and random.random() < 0.4 and all_cherry_candidates:
-                cherry_candidates = [c for c in available if c in all_cherry_candidates]
-                if cherry_candidates:
-                    # Remove a random wall, add cherry-adjacent one
-                    remove_idx = random.randrange(len(new_walls))
-                    removed = new_walls.pop(remove_idx)
-                    new_walls.append(random.choice(cherry_candidates))
-                    available = [c for c in candidates if c not in new_walls]
-                else:
-                    # Fallback to normal swap
-                    new_walls.pop(random.randrange(len(new_walls)))
-                    new_walls.append(random.choice(available))
-                    available.remove(new_walls[-1])
-            else:
-                # Normal swap
-                swaps = 1 if random.random() < 0.7 else 2
-                for _ in range(swaps):
-                    if available and new_walls:
-                        new_walls.pop(random.randrange(len(new_walls)))
-                        w = random.choice(available)
-                        new_walls.append(w)
-                        available.remove(w)
-            
-            new_score = evaluate_walls(state, new_walls)
-            delta = new_score - current_score
-            
-            if delta > 0 or (temp > 0.001 and random.random() < math.exp(delta / max(temp, 0.001))):
-                current_walls = new_walls
-                current_score = new_score
-                if current_score > best_score:
-                    best_score = current_score
-                    best_walls = current_walls.copy()
+        new_score = evaluate_walls(state, new_walls)
+        delta = new_score - current_score
         
-        if restart % 2 == 0:
-            print(f"    [SA] Restart {restart+1}/{num_restarts}: Best = {best_score}")
+        if delta > 0 or _rand() < _exp(delta / max(temp, 0.001)):
+            current_walls = new_walls
+            current_score = new_score
+            if current_score > best_score:
+                best_score = current_score
+                best_walls = current_walls.copy()
     
-    return BenchmarkResult("SA", best_score, best_walls, time.time() - start, total_iterations)
+    return best_score, best_walls, iterations
 
 
-def solve_random_massive(state: GameState, iterations: int = 500000) -> BenchmarkResult:
+def random_search(state: GameState, candidates: list[int], num_walls: int,
+                  iterations: int, rng: random.Random) -> tuple[int, list[int]]:
+    """Score `iterations` random wall sets drawn from candidates; returns the best."""
+    if HAS_NUMBA:
+        # Draws and floods both stay compiled; one call covers the whole chunk
+        best_walls = array('i', bytes(4 * num_walls))
+        best_score = random_search_loop(
+            state.adj_indptr, state.adj_indices, state.edge_mask, state.cells, state.player_idx,
+            array('i', candidates), num_walls, iterations, rng.getrandbits(32), best_walls,
+            state.scratch_walls, state.scratch_seen, state.scratch_queue, state.scratch_parent)
+        return best_score, best_walls.tolist() if best_score else []
+    
+    best_score, best_walls = 0, []
+    
+    # Random draws almost never repeat, so skip the evaluate_walls cache and
+    # reuse one test state, setting and clearing its wall bytes per sample
+    test_state = make_state_with_walls(state, [])
+    test_walls = test_state.walls
+    
+    # Partial Fisher-Yates on one private pool: rng.sample() copies the whole
+    # candidate list and goes through _randbelow() on every call
+    pool = list(candidates)
+    n = len(pool)
+    rand = rng.random
+    
+    for _ in range(iterations):
+        for i in range(num_walls):
+            j = i + int(rand() * (n - i))
+            pool[i], pool[j] = pool[j], pool[i]
+        walls = pool[:num_walls]
+        for w in walls:
+            test_walls[w] = 1
+        score = solve_score_only(test_state, score_to_beat=best_score)[2]
+        for w in walls:
+            test_walls[w] = 0
+        if score > best_score:
+            best_score, best_walls = score, walls
+    
+    return best_score, best_walls
+
+
+# Process-pool plumbing: the (immutable) state is shipped once per worker
+_worker_state: Optional[GameState] = None
+
+
+def _init_worker(state: GameState):
+    global _worker_state
+    _worker_state = state
+
+
+def _seeded_worker(task: tuple) -> object:
     """
-    MASSIVE RANDOM: Half million random samples.
+    Run fn(_worker_state, *args) after reseeding the worker's random module:
+    forked workers would otherwise all replay the parent's random stream.
+    """
+    fn, args, seed = task
+    random.seed(seed)
+    return fn(_worker_state, *args)
+
+
+def _random_search_worker(args: tuple[int, int, int]) -> tuple[int, list[int]]:
+    # Candidates come from the worker's own state copy, so a task is three ints
+    num_walls, iterations, seed = args
+    return random_search(_worker_state, _worker_state.candidate_walls, num_walls, iterations, random.Random(seed))
+
+
+def solve_random_massive(state: GameState, iterations: int = 500000,
+                         workers: Optional[int] = None) -> BenchmarkResult:
+    """
+    MASSIVE RANDOM: Half million random samples, split across CPU cores.
     """
     start = time.time()
-    candidates = find_candidate_walls(state)
+    candidates = state.candidate_walls
     num_walls = min(state.budget, len(candidates))
     best_score, best_walls = 0, []
     
-    for i in range(iterations):
-        walls = random.sample(candidates, num_walls)
-        score = evaluate_walls(state, walls)
-        if score > best_score:
-            best_score = score
-            best_walls = walls.copy()
-            if i % 10000 == 0 or score > best_score - 1:
-                print(f"    [Random 500K] iter {i:,}: New best = {best_score}")
+    workers = workers or os.cpu_count() or 1
+    num_chunks = workers * 4  # A few chunks per core to even out finish times
+    tasks = [(num_walls, iterations // num_chunks + (i < iterations % num_chunks), random.getrandbits(64))
+             for i in range(num_chunks)]
+    
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(state,)) as pool:
+        for done, (score, walls) in enumerate(pool.map(_random_search_worker, tasks), 1):
+            if score > best_score:
+                best_score, best_walls = score, walls
+                print(f"    [Random 500K] chunk {done}/{num_chunks}: New best = {best_score}")
     
     return BenchmarkResult("Random 500K", best_score, best_walls, time.time() - start, iterations)
 
@@ -478,20 +1174,19 @@ def solve_full_random_timed(state: GameState, timeout: float = 120.0) -> Benchma
     TIMED RANDOM: Keep sampling until timeout.
     """
     start = time.time()
-    candidates = find_candidate_walls(state)
+    candidates = state.candidate_walls
     num_walls = min(state.budget, len(candidates))
     best_score, best_walls = 0, []
     iterations = 0
+    rng = random.Random(random.getrandbits(64))
     
     while time.time() - start < timeout:
-        for _ in range(10000):
-            iterations += 1
-            walls = random.sample(candidates, num_walls)
-            score = evaluate_walls(state, walls)
-            if score > best_score:
-                best_score = score
-                best_walls = walls.copy()
-                print(f"    [Random {int(timeout)}s] iter {iterations:,}: New best = {best_score}")
+        score, walls = random_search(state, candidates, num_walls, 10000, rng)
+        iterations += 10000
+        if score > best_score:
+            best_score = score
+            best_walls = walls
+            print(f"    [Random {int(timeout)}s] iter {iterations:,}: New best = {best_score}")
     
     return BenchmarkResult(f"Random {int(timeout)}s", best_score, best_walls, time.time() - start, iterations)
 
@@ -502,7 +1197,7 @@ def solve_hybrid_aggressive(state: GameState) -> BenchmarkResult:
     Optimized: Genetic 3000 gen (plateaus ~2500), SA 4 restarts × 200K = 800K.
     """
     start = time.time()
-    candidates = find_candidate_walls(state)
+    candidates = state.candidate_walls
     num_walls = min(state.budget, len(candidates))
     
     # Pre-compute cherry neighbors for SA phase
@@ -510,6 +1205,7 @@ def solve_hybrid_aggressive(state: GameState) -> BenchmarkResult:
     all_cherry_candidates = set()
     for neighbors in cherry_neighbors.values():
         all_cherry_candidates.update(neighbors)
+    cherry_pool = list(all_cherry_candidates)
     
     # Phase 1: Genetic to find good starting points
     print("    [Hybrid] Phase 1: Genetic search (3000 gen)...")
@@ -521,6 +1217,10 @@ def solve_hybrid_aggressive(state: GameState) -> BenchmarkResult:
     print(f"    [Hybrid] Phase 2: SA polish from score {best_score}...")
     num_restarts = 4
     iters_per_restart = 200000
+    _rand, _randrange, _exp = random.random, random.randrange, math.exp
+    # One draw per move, split as in sa_restart
+    cherry_cut = 0.4 if cherry_pool else 0.0
+    single_cut = cherry_cut + 0.7 * (1 - cherry_cut)
     
     for restart in range(num_restarts):
         if restart > 0 and random.random() < 0.3:
@@ -532,40 +1232,36 @@ def solve_hybrid_aggressive(state: GameState) -> BenchmarkResult:
             current_score = best_score
         
         temp = 50.0
-        initial_temp = temp
         
         for i in range(iters_per_restart):
-            temp = initial_temp * (0.995 ** i)
+            if i:
+                temp *= 0.995
             
             new_walls = current_walls.copy()
-            available = [c for c in candidates if c not in new_walls]
             
             # Cherry-aware swap: 40% chance to try cherry-adjacent positions
-            if available and new_walls and random.random() < 0.4 and all_cherry_candidates:
-                cherry_candidates = [c for c in available if c in all_cherry_candidates]
-                if cherry_candidates:
-                    remove_idx = random.randrange(len(new_walls))
-                    new_walls.pop(remove_idx)
-                    new_walls.append(random.choice(cherry_candidates))
-                else:
+            move = _rand()
+            if new_walls and move < cherry_cut:
+                w = pick_free_candidate(cherry_pool, new_walls)
+                if w is None:
                     # Fallback
-                    new_walls.pop(random.randrange(len(new_walls)))
-                    new_walls.append(random.choice(available))
+                    w = pick_free_candidate(candidates, new_walls)
+                if w is not None:
+                    new_walls.pop(_randrange(len(new_walls)))
+                    new_walls.append(w)
             else:
                 # Normal swap
-                if available and new_walls:
-                    swaps = 1 if random.random() < 0.7 else 2
-                    for _ in range(swaps):
-                        if available and new_walls:
-                            new_walls.pop(random.randrange(len(new_walls)))
-                            w = random.choice(available)
-                            new_walls.append(w)
-                            available.remove(w)
+                swaps = 1 if move < single_cut else 2
+                for _ in range(swaps):
+                    w = pick_free_candidate(candidates, new_walls)
+                    if w is not None and new_walls:
+                        new_walls.pop(_randrange(len(new_walls)))
+                        new_walls.append(w)
             
             new_score = evaluate_walls(state, new_walls)
             delta = new_score - current_score
             
-            if delta > 0 or (temp > 0.1 and random.random() < math.exp(delta / max(temp, 0.1))):
+            if delta > 0 or (temp > 0.1 and _rand() < _exp(delta / temp)):
                 current_walls = new_walls
                 current_score = new_score
                 if current_score > best_score:
@@ -584,100 +1280,88 @@ def solve_hybrid_aggressive(state: GameState) -> BenchmarkResult:
 # BENCHMARK
 # =============================================================================
 
-def solve_mega_hybrid(state: GameState) -> BenchmarkResult:
-    """
-    MEGA HYBRID: Multiple genetic runs + intensive SA from each.
-    This should find very high quality solutions.
-    """
-    start = time.time()
-    candidates = find_candidate_walls(state)
+def mega_hybrid_run(state: GameState, run: int) -> tuple[int, list[int], int]:
+    """One genetic run + SA polish of solve_mega_hybrid; returns (score, walls, iterations)."""
+    candidates = state.candidate_walls
     num_walls = min(state.budget, len(candidates))
+    iterations = 0
     
-    best_score, best_walls = 0, []
-    total_iterations = 0
+    print(f"    [Mega Hybrid] Run {run+1}/5: Genetic phase...")
     
-    # Run 5 independent genetic searches, then polish each
-    for run in range(5):
-        print(f"    [Mega Hybrid] Run {run+1}/5: Genetic phase...")
-        
-        # Genetic phase: 2000 generations
-        pop_size = 200
-        population = [random.sample(candidates, num_walls) for _ in range(pop_size)]
-        run_best_score, run_best_walls = 0, []
-        
-        for gen in range(2000):
-            scored = [(evaluate_walls(state, ind), ind) for ind in population]
-            total_iterations += pop_size
-            scored.sort(key=lambda x: x[0], reverse=True)
-            
-            if scored[0][0] > run_best_score:
-                run_best_score = scored[0][0]
-                run_best_walls = scored[0][1].copy()
-            
-            elite = [ind.copy() for _, ind in scored[:pop_size // 10]]
-            new_pop = elite.copy()
-            
-            while len(new_pop) < pop_size:
-                t1 = random.sample(scored, min(5, len(scored)))
-                p1 = max(t1, key=lambda x: x[0])[1]
-                t2 = random.sample(scored, min(5, len(scored)))
-                p2 = max(t2, key=lambda x: x[0])[1]
-                
-                child = list(set(random.sample(p1, len(p1)//2) + random.sample(p2, len(p2)//2)))
-                while len(child) < num_walls:
-                    available = [c for c in candidates if c not in child]
-                    if available: child.append(random.choice(available))
-                    else: break
-                if len(child) > num_walls:
-                    child = random.sample(child, num_walls)
-                
-                if random.random() < 0.5:
-                    available = [c for c in candidates if c not in child]
-                    if available and child:
-                        child.pop(random.randrange(len(child)))
-                        child.append(random.choice(available))
-                
-                new_pop.append(child)
-            
-            for i in range(pop_size // 10):
-                new_pop[-(i+1)] = random.sample(candidates, num_walls)
-            
-            population = new_pop
+    # Genetic phase: 2000 generations
+    pop_size = 200
+    population = random_wall_sets(candidates, num_walls, pop_size)
+    run_best_score, run_best_walls = 0, []
+    stale_gens = 0
+    
+    for gen in range(2000):
+        scored = list(zip(evaluate_population(state, population), population))
+        iterations += pop_size
+        elite_pairs = heapq.nlargest(pop_size // 10, scored, key=lambda x: x[0])
         
-        print(f"    [Mega Hybrid] Run {run+1}/5: Genetic found {run_best_score}, SA polishing...")
+        if elite_pairs[0][0] > run_best_score:
+            run_best_score = elite_pairs[0][0]
+            run_best_walls = elite_pairs[0][1]
+            stale_gens = 0
+        else:
+            stale_gens += 1
+            if run_best_score and stale_gens >= GA_STOP_GENS:
+                break
         
-        # SA polish phase: 200K iterations
-        current_walls = run_best_walls.copy()
-        current_score = run_best_score
-        temp = 30.0
+        new_pop = [ind for _, ind in elite_pairs]
         
-        for i in range(200000):
-            total_iterations += 1
-            temp *= 0.99997
-            
-            new_walls = current_walls.copy()
-            available = [c for c in candidates if c not in new_walls]
+        while len(new_pop) < pop_size:
+            p1 = _tournament(scored, 5)
+            p2 = _tournament(scored, 5)
             
-            if available and new_walls:
-                new_walls.pop(random.randrange(len(new_walls)))
-                new_walls.append(random.choice(available))
+            child = crossover_walls(p1, p2, candidates, num_walls)
             
-            new_score = evaluate_walls(state, new_walls)
-            delta = new_score - current_score
+            if random.random() < 0.5:
+                w = pick_free_candidate(candidates, child)
+                if w is not None and child:
+                    child.pop(random.randrange(len(child)))
+                    child.append(w)
             
-            if delta > 0 or random.random() < math.exp(delta / max(temp, 0.001)):
-                current_walls = new_walls
-                current_score = new_score
-                if current_score > run_best_score:
-                    run_best_score = current_score
-                    run_best_walls = current_walls.copy()
+            new_pop.append(child)
         
-        print(f"    [Mega Hybrid] Run {run+1}/5: Final = {run_best_score}")
+        immigrants = pop_size // 2 if stale_gens == GA_BURST_GENS else pop_size // 10
+        new_pop[len(new_pop) - immigrants:] = random_wall_sets(candidates, num_walls, immigrants)
         
-        if run_best_score > best_score:
-            best_score = run_best_score
-            best_walls = run_best_walls.copy()
-            print(f"    [Mega Hybrid] NEW OVERALL BEST: {best_score}")
+        population = new_pop
+    
+    print(f"    [Mega Hybrid] Run {run+1}/5: Genetic found {run_best_score}, SA polishing...")
+    
+    # SA polish phase: 200K iterations
+    run_best_score, run_best_walls, polish_iterations = sa_polish(
+        state, run_best_walls, run_best_score, temp=30.0, cooling=0.99997, iterations=200000)
+    iterations += polish_iterations
+    
+    print(f"    [Mega Hybrid] Run {run+1}/5: Final = {run_best_score}")
+    
+    return run_best_score, run_best_walls, iterations
+
+
+def solve_mega_hybrid(state: GameState, workers: Optional[int] = None) -> BenchmarkResult:
+    """
+    MEGA HYBRID: Multiple genetic runs + intensive SA from each.
+    This should find very high quality solutions.
+    """
+    start = time.time()
+    
+    best_score, best_walls = 0, []
+    total_iterations = 0
+    
+    # Run 5 independent genetic searches, then polish each - one per worker
+    tasks = [(mega_hybrid_run, (run,), random.getrandbits(64)) for run in range(5)]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(state,)) as pool:
+        for run_best_score, run_best_walls, iterations in pool.map(_seeded_worker, tasks):
+            total_iterations += iterations
+            if run_best_score > best_score:
+                best_score = run_best_score
+                best_walls = run_best_walls.copy()
+                print(f"    [Mega Hybrid] NEW OVERALL BEST: {best_score}")
     
     return BenchmarkResult("Mega Hybrid", best_score, best_walls, time.time() - start, total_iterations)
 
@@ -688,7 +1372,7 @@ def solve_cherry_focused(state: GameState) -> BenchmarkResult:
     Key insight: Cherries give +3 bonus, so capturing all is important.
     """
     start = time.time()
-    candidates = find_candidate_walls(state)
+    candidates = state.candidate_walls
     num_walls = min(state.budget, len(candidates))
     
     # Find cherry positions
@@ -699,15 +1383,15 @@ def solve_cherry_focused(state: GameState) -> BenchmarkResult:
     
     # Genetic algorithm that heavily rewards capturing cherries
     pop_size = 300
-    population = [random.sample(candidates, num_walls) for _ in range(pop_size)]
+    population = random_wall_sets(candidates, num_walls, pop_size)
+    stale_gens = 0
     
     for gen in range(3000):
+        gen_start_best = best_score
         scored = []
-        for ind in population:
+        for score, ind in zip(evaluate_population(state, population), population):
             iterations += 1
-            result = solve(make_state_with_walls(state, ind))
             # Score = base + extra weight for captured cherries
-            score = result.total_score
             if score > best_score:
                 best_score = score
                 best_walls = ind.copy()
@@ -716,69 +1400,87 @@ def solve_cherry_focused(state: GameState) -> BenchmarkResult:
         if gen % 200 == 0:
             print(f"    [Cherry] Gen {gen}: Best = {best_score}")
         
-        scored.sort(key=lambda x: x[0], reverse=True)
-        elite = [ind.copy() for _, ind in scored[:pop_size // 10]]
-        new_pop = elite.copy()
+        if best_score > gen_start_best:
+            stale_gens = 0
+        else:
+            stale_gens += 1
+            if best_score and stale_gens >= GA_STOP_GENS:
+                break
+        
+        new_pop = [ind for _, ind in heapq.nlargest(pop_size // 10, scored, key=lambda x: x[0])]
         
         while len(new_pop) < pop_size:
-            t = random.sample(scored, min(5, len(scored)))
-            p1 = max(t, key=lambda x: x[0])[1]
-            t = random.sample(scored, min(5, len(scored)))
-            p2 = max(t, key=lambda x: x[0])[1]
+            p1 = _tournament(scored, 5)
+            p2 = _tournament(scored, 5)
             
-            child = list(set(random.sample(p1, len(p1)//2) + random.sample(p2, len(p2)//2)))
-            while len(child) < num_walls:
-                available = [c for c in candidates if c not in child]
-                if available: child.append(random.choice(available))
-                else: break
-            if len(child) > num_walls:
-                child = random.sample(child, num_walls)
+            child = crossover_walls(p1, p2, candidates, num_walls)
             
             if random.random() < 0.6:
-                available = [c for c in candidates if c not in child]
                 swaps = random.randint(1, 3)
                 for _ in range(swaps):
-                    if available and child:
+                    w = pick_free_candidate(candidates, child)
+                    if w is not None and child:
                         child.pop(random.randrange(len(child)))
-                        w = random.choice(available)
                         child.append(w)
-                        available.remove(w)
             
             new_pop.append(child)
         
-        for i in range(pop_size // 5):  # More immigrants for diversity
-            new_pop[-(i+1)] = random.sample(candidates, num_walls)
+        immigrants = pop_size // 2 if stale_gens == GA_BURST_GENS else pop_size // 5  # More immigrants for diversity
+        new_pop[len(new_pop) - immigrants:] = random_wall_sets(candidates, num_walls, immigrants)
         
         population = new_pop
     
     return BenchmarkResult("Cherry Focused", best_score, best_walls, time.time() - start, iterations)
 
 
+def single_wall_areas(state: GameState, cells: list[int]) -> list[int]:
+    """
+    Flooded area with a lone wall on each of cells, -1 where that wall
+    already encloses the horse. One compiled call for the whole screen.
+    """
+    if HAS_NUMBA:
+        areas = array('i', bytes(4 * len(cells)))
+        single_wall_floods(state.adj_indptr, state.adj_indices, state.edge_mask, state.cells, state.scratch_walls,
+                           state.player_idx, array('i', cells), areas,
+                           state.scratch_seen, state.scratch_queue, state.scratch_parent)
+        return areas.tolist()
+    
+    # One test state for the whole scan: set the wall byte, flood, clear it
+    test_state = make_state_with_walls(state, [])
+    test_walls = test_state.walls
+    areas = []
+    for cell in cells:
+        test_walls[cell] = 1
+        escaped, area, _ = solve_score_only(test_state)
+        test_walls[cell] = 0
+        areas.append(area if escaped else -1)
+    return areas
+
+
 def find_chokepoints(state: GameState) -> list[tuple[int, int]]:
     """
     Find cells that are on many escape paths - these are good wall candidates.
     Returns list of (cell_index, importance_score).
     """
-    candidates = find_candidate_walls(state)
+    candidates = state.candidate_walls
     result = solve(state)
     
     if not result.escaped:
         return []  # Already enclosed
     
-    # For each candidate, count how much it reduces reachable area
+    # For each candidate, count how much it reduces reachable area.
+    # A wall the horse can't reach leaves its flood (and the escape) untouched.
     chokepoints = []
     baseline_area = len(result.visited)
+    screen = [cell for cell in candidates if cell in result.visited]
     
-    for cell in candidates:
-        test_state = make_state_with_walls(state, [cell])
-        test_result = solve(test_state)
-        
-        if not test_result.escaped:
+    for cell, area in zip(screen, single_wall_areas(state, screen)):
+        if area < 0:
             # This single wall encloses! Very important
             chokepoints.append((cell, 1000))
         else:
             # Measure reduction in reachable area
-            reduction = baseline_area - len(test_result.visited)
+            reduction = baseline_area - area
             if reduction > 0:
                 chokepoints.append((cell, reduction))
     
@@ -791,7 +1493,7 @@ def solve_chokepoint_guided(state: GameState) -> BenchmarkResult:
     CHOKEPOINT-GUIDED: Start with important cells, then refine.
     """
     start = time.time()
-    candidates = find_candidate_walls(state)
+    candidates = state.candidate_walls
     num_walls = min(state.budget, len(candidates))
     
     # Find chokepoints
@@ -819,48 +1521,45 @@ def solve_chokepoint_guided(state: GameState) -> BenchmarkResult:
         population.append(walls)
     
     # Other half random
-    for _ in range(pop_size - len(population)):
-        population.append(random.sample(candidates, num_walls))
+    population.extend(random_wall_sets(candidates, num_walls, pop_size - len(population)))
     
+    stale_gens = 0
     for gen in range(5000):
+        gen_start_best = best_score
         scored = []
-        for ind in population:
+        for score, ind in zip(evaluate_population(state, population), population):
             iterations += 1
-            score = evaluate_walls(state, ind)
             if score > best_score:
                 best_score = score
                 best_walls = ind.copy()
                 print(f"    [Chokepoint] Gen {gen}: NEW BEST = {best_score}")
             scored.append((score, ind))
         
-        scored.sort(key=lambda x: x[0], reverse=True)
-        elite = [ind.copy() for _, ind in scored[:pop_size // 10]]
-        new_pop = elite.copy()
+        if best_score > gen_start_best:
+            stale_gens = 0
+        else:
+            stale_gens += 1
+            if best_score and stale_gens >= GA_STOP_GENS:
+                break
+        
+        new_pop = [ind for _, ind in heapq.nlargest(pop_size // 10, scored, key=lambda x: x[0])]
         
         while len(new_pop) < pop_size:
-            t1 = random.sample(scored, min(7, len(scored)))
-            p1 = max(t1, key=lambda x: x[0])[1]
-            t2 = random.sample(scored, min(7, len(scored)))
-            p2 = max(t2, key=lambda x: x[0])[1]
+            p1 = _tournament(scored, 7)
+            p2 = _tournament(scored, 7)
             
-            child = list(set(random.sample(p1, len(p1)//2) + random.sample(p2, len(p2)//2)))
-            while len(child) < num_walls:
-                available = [c for c in candidates if c not in child]
-                if available: child.append(random.choice(available))
-                else: break
-            if len(child) > num_walls:
-                child = random.sample(child, num_walls)
+            child = crossover_walls(p1, p2, candidates, num_walls)
             
             if random.random() < 0.5:
-                available = [c for c in candidates if c not in child]
-                if available and child:
+                w = pick_free_candidate(candidates, child)
+                if w is not None and child:
                     child.pop(random.randrange(len(child)))
-                    child.append(random.choice(available))
+                    child.append(w)
             
             new_pop.append(child)
         
-        # 20% immigrants with chokepoint bias
-        for i in range(pop_size // 5):
+        # 20% immigrants with chokepoint bias, half the population on a stagnation burst
+        for i in range(pop_size // 2 if stale_gens == GA_BURST_GENS else pop_size // 5):
             if random.random() < 0.5 and top_chokepoints:
                 n_from_choke = random.randint(4, min(num_walls, len(top_chokepoints)))
                 walls = random.sample(top_chokepoints, n_from_choke)
@@ -875,135 +1574,115 @@ def solve_chokepoint_guided(state: GameState) -> BenchmarkResult:
     
     # SA polish
     print(f"    [Chokepoint] SA polish from {best_score}...")
-    current_walls = best_walls.copy()
-    current_score = best_score
-    temp = 50.0
+    polish_score, polish_walls, polish_iterations = sa_polish(
+        state, best_walls, best_score, temp=50.0, cooling=0.99998, iterations=300000)
+    iterations += polish_iterations
+    if polish_score > best_score:
+        best_score, best_walls = polish_score, polish_walls
+        print(f"    [Chokepoint] SA improved: {best_score}")
     
-    for i in range(300000):
-        iterations += 1
-        temp *= 0.99998
+    return BenchmarkResult("Chokepoint Guided", best_score, best_walls, time.time() - start, iterations)
+
+
+def ultimate_run(state: GameState, deadline: float) -> tuple[int, list[int], int]:
+    """One genetic + SA cycle of solve_ultimate, cut short at deadline; returns (score, walls, iterations)."""
+    candidates = state.candidate_walls
+    num_walls = min(state.budget, len(candidates))
+    iterations = 0
+    
+    # Genetic phase: 1500 generations
+    pop_size = 150
+    population = random_wall_sets(candidates, num_walls, pop_size)
+    run_best_score, run_best_walls = 0, []
+    stale_gens = 0
+    
+    for gen in range(1500):
+        if time.time() > deadline:
+            break
+            
+        scored = list(zip(evaluate_population(state, population), population))
+        iterations += pop_size
+        elite_pairs = heapq.nlargest(pop_size // 10, scored, key=lambda x: x[0])
         
-        new_walls = current_walls.copy()
-        available = [c for c in candidates if c not in new_walls]
+        if elite_pairs[0][0] > run_best_score:
+            run_best_score = elite_pairs[0][0]
+            run_best_walls = elite_pairs[0][1]
+            stale_gens = 0
+        else:
+            stale_gens += 1
+            if run_best_score and stale_gens >= GA_STOP_GENS:
+                break
         
-        if available and new_walls:
-            new_walls.pop(random.randrange(len(new_walls)))
-            new_walls.append(random.choice(available))
+        new_pop = [ind for _, ind in elite_pairs]
         
-        new_score = evaluate_walls(state, new_walls)
-        delta = new_score - current_score
+        while len(new_pop) < pop_size:
+            p1 = _tournament(scored, 5)
+            p2 = _tournament(scored, 5)
+            
+            child = crossover_walls(p1, p2, candidates, num_walls)
+            
+            if random.random() < 0.5:
+                w = pick_free_candidate(candidates, child)
+                if w is not None and child:
+                    child.pop(random.randrange(len(child)))
+                    child.append(w)
+            
+            new_pop.append(child)
         
-        if delta > 0 or random.random() < math.exp(delta / max(temp, 0.001)):
-            current_walls = new_walls
-            current_score = new_score
-            if current_score > best_score:
-                best_score = current_score
-                best_walls = current_walls.copy()
-                print(f"    [Chokepoint] SA improved: {best_score}")
+        immigrants = pop_size // 2 if stale_gens == GA_BURST_GENS else pop_size // 10
+        new_pop[len(new_pop) - immigrants:] = random_wall_sets(candidates, num_walls, immigrants)
+        
+        population = new_pop
     
-    return BenchmarkResult("Chokepoint Guided", best_score, best_walls, time.time() - start, iterations)
+    # SA polish phase
+    run_best_score, run_best_walls, polish_iterations = sa_polish(
+        state, run_best_walls, run_best_score, temp=30.0, cooling=0.99996, iterations=150000, deadline=deadline)
+    iterations += polish_iterations
+    
+    return run_best_score, run_best_walls, iterations
 
 
-def solve_ultimate(state: GameState, time_limit: float = 300.0) -> BenchmarkResult:
+def solve_ultimate(state: GameState, time_limit: float = 300.0,
+                   workers: Optional[int] = None) -> BenchmarkResult:
     """
     ULTIMATE: Keep running genetic + SA cycles until time runs out.
     This is designed to find the optimal or near-optimal solution.
+    Cycles are independent, so every CPU core runs one at a time.
     """
     start = time.time()
-    candidates = find_candidate_walls(state)
-    num_walls = min(state.budget, len(candidates))
+    deadline = start + time_limit
     
     best_score, best_walls = 0, []
     total_iterations = 0
     run_number = 0
     
-    while time.time() - start < time_limit:
-        run_number += 1
-        
-        # Genetic phase: 1500 generations
-        pop_size = 150
-        population = [random.sample(candidates, num_walls) for _ in range(pop_size)]
-        run_best_score, run_best_walls = 0, []
-        
-        for gen in range(1500):
-            if time.time() - start > time_limit:
-                break
-                
-            scored = [(evaluate_walls(state, ind), ind) for ind in population]
-            total_iterations += pop_size
-            scored.sort(key=lambda x: x[0], reverse=True)
-            
-            if scored[0][0] > run_best_score:
-                run_best_score = scored[0][0]
-                run_best_walls = scored[0][1].copy()
-            
-            elite = [ind.copy() for _, ind in scored[:pop_size // 10]]
-            new_pop = elite.copy()
-            
-            while len(new_pop) < pop_size:
-                t1 = random.sample(scored, min(5, len(scored)))
-                p1 = max(t1, key=lambda x: x[0])[1]
-                t2 = random.sample(scored, min(5, len(scored)))
-                p2 = max(t2, key=lambda x: x[0])[1]
+    workers = workers or os.cpu_count() or 1
+    
+    def submit():
+        return pool.submit(_seeded_worker, (ultimate_run, (deadline,), random.getrandbits(64)))
+    
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(state,)) as pool:
+        pending = {submit() for _ in range(workers)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                run_number += 1
+                run_best_score, run_best_walls, iterations = future.result()
+                total_iterations += iterations
                 
-                child = list(set(random.sample(p1, len(p1)//2) + random.sample(p2, len(p2)//2)))
-                while len(child) < num_walls:
-                    available = [c for c in candidates if c not in child]
-                    if available: child.append(random.choice(available))
-                    else: break
-                if len(child) > num_walls:
-                    child = random.sample(child, num_walls)
+                elapsed = time.time() - start
+                print(f"    [Ultimate] Run {run_number} @ {elapsed:.0f}s: {run_best_score}", end="")
                 
-                if random.random() < 0.5:
-                    available = [c for c in candidates if c not in child]
-                    if available and child:
-                        child.pop(random.randrange(len(child)))
-                        child.append(random.choice(available))
+                if run_best_score > best_score:
+                    best_score = run_best_score
+                    best_walls = run_best_walls.copy()
+                    print(f" ⭐ NEW BEST!")
+                else:
+                    print()
                 
-                new_pop.append(child)
-            
-            for i in range(pop_size // 10):
-                new_pop[-(i+1)] = random.sample(candidates, num_walls)
-            
-            population = new_pop
-        
-        # SA polish phase
-        current_walls = run_best_walls.copy()
-        current_score = run_best_score
-        temp = 30.0
-        
-        for i in range(150000):
-            if time.time() - start > time_limit:
-                break
-            total_iterations += 1
-            temp *= 0.99996
-            
-            new_walls = current_walls.copy()
-            available = [c for c in candidates if c not in new_walls]
-            
-            if available and new_walls:
-                new_walls.pop(random.randrange(len(new_walls)))
-                new_walls.append(random.choice(available))
-            
-            new_score = evaluate_walls(state, new_walls)
-            delta = new_score - current_score
-            
-            if delta > 0 or random.random() < math.exp(delta / max(temp, 0.001)):
-                current_walls = new_walls
-                current_score = new_score
-                if current_score > run_best_score:
-                    run_best_score = current_score
-                    run_best_walls = current_walls.copy()
-        
-        elapsed = time.time() - start
-        print(f"    [Ultimate] Run {run_number} @ {elapsed:.0f}s: {run_best_score}", end="")
-        
-        if run_best_score > best_score:
-            best_score = run_best_score
-            best_walls = run_best_walls.copy()
-            print(f" ⭐ NEW BEST!")
-        else:
-            print()
+                # Keep every worker busy until time runs out
+                if time.time() < deadline:
+                    pending.add(submit())
     
     return BenchmarkResult("Ultimate", best_score, best_walls, time.time() - start, total_iterations)
 
@@ -1019,6 +1698,7 @@ def run_all_solvers(state: GameState) -> list[BenchmarkResult]:
     
     for name, solver_fn in solvers:
         print(f"  Running {name}...")
+        evaluate_walls_cached.cache_clear()  # Don't let a solver time on another's cache
         result = solver_fn()
         print(f"    Final score: {result.score}\n")
         results.append(result)
@@ -1085,7 +1765,7 @@ if __name__ == "__main__":
         print(f"   Play count: {puzzle_data['playCount']:,}")
         
         state = parse_map(puzzle_data['map'], puzzle_data['budget'])
-        candidates = find_candidate_walls(state)
+        candidates = state.candidate_walls
         
         print(f"   Grid: {state.cols}x{state.rows} | Candidates: {len(candidates)}")
         print(f"   Search space: C({len(candidates)},{state.budget}) combinations\n")
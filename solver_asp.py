@@ -5,8 +5,12 @@ Based on the actual method used by the game!
 ASP is a declarative constraint programming approach.
 """
 
+import hashlib
+import os
 import requests
-from dataclasses import dataclass
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from typing import Optional
 import time
 
@@ -17,115 +21,138 @@ except ImportError:
     HAS_CLINGO = False
     print("⚠️  Clingo not installed. Run: pip install clingo")
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    # Numba is optional: without it flood() uses the bitset flood_bits()
+    HAS_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
 
 @dataclass
 class GameState:
     cols: int
     rows: int
-    terrain: list[int]  # 0 = grass, 1 = water
-    cherries: list[bool]
+    terrain: bytearray  # 0 = grass, 1 = water
+    cherries: bytearray  # 1 = cherry
     player_idx: int
     budget: int
+    edge_mask: Optional[bytearray] = field(default=None, repr=False)  # 1 = border cell
+    queue: Optional[array] = field(default=None, repr=False)  # flood_fill()'s BFS queue, reused by every flood
+    # Per-cell lookup tables, so loops over cells index instead of dividing and
+    # bounds-checking: "row,col" as ASP arguments and in-grid neighbors (down, up, right, left)
+    coords_of: Optional[list[str]] = field(default=None, repr=False)
+    neighbors_of: Optional[list[tuple[int, ...]]] = field(default=None, repr=False)
+    # Cell masks packed into ints, cell i at bit 8*i, for flood_bits()
+    grass_bits: Optional[int] = field(default=None, repr=False)
+    cherry_bits: Optional[int] = field(default=None, repr=False)
+    edge_bits: Optional[int] = field(default=None, repr=False)
+    not_first_col: Optional[int] = field(default=None, repr=False)
+    not_last_col: Optional[int] = field(default=None, repr=False)
+    
+    def __post_init__(self):
+        cols, rows = self.cols, self.rows
+        if self.edge_mask is None:
+            self.edge_mask = bytearray(rows * cols)
+            for row in range(rows):
+                self.edge_mask[row * cols] = self.edge_mask[row * cols + cols - 1] = 1
+            self.edge_mask[:cols] = self.edge_mask[-cols:] = b'\x01' * cols
+        if self.queue is None:
+            # Each cell is enqueued at most once, so rows*cols slots never wrap
+            self.queue = array('i', bytes(4 * rows * cols))
+        if self.coords_of is None:
+            self.coords_of = [f"{row},{col}" for row in range(rows) for col in range(cols)]
+            self.neighbors_of = [
+                tuple(n_row * cols + n_col
+                      for n_row, n_col in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1))
+                      if 0 <= n_row < rows and 0 <= n_col < cols)
+                for row in range(rows) for col in range(cols)]
+        if self.grass_bits is None:
+            pack = lambda mask: int.from_bytes(mask, 'little')
+            self.grass_bits = pack(bytes(1 - t for t in self.terrain))
+            self.cherry_bits = pack(self.cherries)
+            self.edge_bits = pack(self.edge_mask)
+            self.not_first_col = pack(bytes(1 if col else 0 for row in range(rows) for col in range(cols)))
+            self.not_last_col = pack(bytes(1 if col < cols - 1 else 0 for row in range(rows) for col in range(cols)))
+
+
+# Byte -> cell attribute lookup tables, applied to a whole map with bytes.translate()
+TERRAIN_LUT = bytes(1 if b == ord('~') else 0 for b in range(256))
+CHERRY_LUT = bytes(1 if b == ord('C') else 0 for b in range(256))
 
 
 def parse_map(map_string: str, budget: int) -> GameState:
     lines = map_string.strip().split('\n')
     rows, cols = len(lines), len(lines[0])
-    terrain, cherries = [], []
-    player_idx = -1
+    # Short lines are padded with grass, long ones cut to the first line's width
+    raw = ''.join(line[:cols].ljust(cols, '.') for line in lines).encode('ascii', 'replace')
     
-    for row in range(rows):
-        for col in range(cols):
-            char = lines[row][col] if col < len(lines[row]) else '.'
-            if char == 'H':
-                player_idx = row * cols + col
-                terrain.append(0)
-                cherries.append(False)
-            elif char == 'C':
-                terrain.append(0)
-                cherries.append(True)
-            elif char == '~':
-                terrain.append(1)
-                cherries.append(False)
-            else:
-                terrain.append(0)
-                cherries.append(False)
+    terrain = bytearray(raw.translate(TERRAIN_LUT))
+    cherries = bytearray(raw.translate(CHERRY_LUT))
+    player_idx = raw.rfind(b'H')
     
     return GameState(cols, rows, terrain, cherries, player_idx, budget)
 
 
+# Puzzle-independent part of the program, appended after the facts
+ASP_RULES = """
+% Choice: place wall on any candidate cell (see generate_asp_program)
+{ wall(R,C) } :- candidate(R,C).
+
+% Reachability from horse (enclosed/reachable cells)
+z(R,C) :- horse(R,C).
+z(R2,C2) :- z(R1,C1), edge(R1,C1, R2,C2), not wall(R2,C2).
+
+% Horse cannot reach boundary (would escape)
+:- z(R,C), boundary(R,C).
+
+% Maximize enclosed area (cherries worth +3 bonus = 4 total)
+#maximize { 4,R,C : z(R,C), cherry(R,C) ; 1,R,C : z(R,C), not cherry(R,C) }.
+
+% Output wall positions
+#show wall/2.
+
+#program limit(b).
+% Budget constraint, grounded along with base for the budget being solved
+:- #count { R,C : wall(R,C) } > b."""
+
+
 def generate_asp_program(state: GameState) -> str:
     """Generate ASP program for Clingo from puzzle state."""
-    
-    lines = []
-    lines.append(f"#const budget={state.budget}.")
+    rows, cols = state.rows, state.cols
     
     # Horse position
-    horse_row = state.player_idx // state.cols
-    horse_col = state.player_idx % state.cols
-    lines.append(f"horse({horse_row},{horse_col}).")
-    
-    # Cells, boundaries, water, cherries
-    for idx in range(len(state.terrain)):
-        row = idx // state.cols
-        col = idx % state.cols
-        
-        lines.append(f"cell({row},{col}).")
-        
-        # Boundary = edge of grid
-        if row == 0 or row == state.rows - 1 or col == 0 or col == state.cols - 1:
-            lines.append(f"boundary({row},{col}).")
-        
-        if state.terrain[idx] == 1:
-            lines.append(f"water({row},{col}).")
-        
-        if state.cherries[idx]:
-            lines.append(f"cherry({row},{col}).")
-    
-    # Adjacency rules (4-way connectivity)
-    lines.append("")
-    lines.append("% Adjacent cells (4-way connectivity)")
-    lines.append("adj(R,C, R+1,C) :- cell(R,C), cell(R+1,C).")
-    lines.append("adj(R,C, R-1,C) :- cell(R,C), cell(R-1,C).")
-    lines.append("adj(R,C, R,C+1) :- cell(R,C), cell(R,C+1).")
-    lines.append("adj(R,C, R,C-1) :- cell(R,C), cell(R,C-1).")
-    
-    # Walkable = not water
-    lines.append("")
-    lines.append("% Walkable = not water")
-    lines.append("walkable(R,C) :- cell(R,C), not water(R,C).")
-    
-    # Wall choice
-    lines.append("")
-    lines.append("% Choice: place wall on any walkable cell except horse and cherries")
-    lines.append("{ wall(R,C) } :- walkable(R,C), not horse(R,C), not cherry(R,C).")
-    
-    # Budget constraint
-    lines.append("")
-    lines.append("% Budget constraint")
-    lines.append(":- #count { R,C : wall(R,C) } > budget.")
-    
-    # Reachability from horse (flood fill)
-    lines.append("")
-    lines.append("% Reachability from horse (enclosed/reachable cells)")
-    lines.append("z(R,C) :- horse(R,C).")
-    lines.append("z(R2,C2) :- z(R1,C1), adj(R1,C1, R2,C2), walkable(R2,C2), not wall(R2,C2).")
-    
-    # Horse cannot reach boundary
-    lines.append("")
-    lines.append("% Horse cannot reach boundary (would escape)")
-    lines.append(":- z(R,C), boundary(R,C).")
-    
-    # Maximize enclosed area
-    lines.append("")
-    lines.append("% Maximize enclosed area (cherries worth +3 bonus = 4 total)")
-    lines.append("#maximize { 4,R,C : z(R,C), cherry(R,C) ; 1,R,C : z(R,C), not cherry(R,C) }.")
-    
-    # Output
-    lines.append("")
-    lines.append("% Output wall positions")
-    lines.append("#show wall/2.")
-    
+    horse_row, horse_col = divmod(state.player_idx, cols)
+    lines = [f"horse({horse_row},{horse_col})."]
+    
+    # Boundaries as intervals that Clingo expands while grounding, then one
+    # fact per cherry
+    last_row, last_col = rows - 1, cols - 1
+    lines.append(f"boundary((0;{last_row}),0..{last_col}). boundary(0..{last_row},(0;{last_col})).")
+    coords_of = state.coords_of
+    lines += [f"cherry({coords_of[idx]})." for idx, c in enumerate(state.cherries) if c]
+    
+    # Only grass the horse can reach on the empty map matters; walls and the
+    # flood never go anywhere else
+    reachable, _, _, _ = flood(state, bytearray(len(state.terrain)))
+    
+    # Wall candidates: reachable grass minus the horse and cherries
+    lines += [f"candidate({coords_of[idx]})." for idx in range(rows * cols)
+              if reachable[idx] and idx != state.player_idx and not state.cherries[idx]]
+    
+    # Directed edges between adjacent reachable cells, so the reachability rule
+    # never grounds over water or the part of the map the horse can't get to.
+    # Down/up/right/left is the order the old adj/4 rules grounded in; clasp
+    # solved twice as slowly with the edges listed up/down/left/right
+    for idx, neighbors in enumerate(state.neighbors_of):
+        if reachable[idx]:
+            coords = coords_of[idx]
+            lines += [f"edge({coords},{coords_of[n]})." for n in neighbors if reachable[n]]
+    
+    lines.append(ASP_RULES)
     return "\n".join(lines)
 
 
@@ -134,22 +161,73 @@ def solve_with_clingo(state: GameState, time_limit: int = 60) -> tuple[int, list
     Solve using Clingo ASP solver.
     Returns (score, wall_indices, solve_time)
     """
+    return solve_budgets(state, [state.budget])[state.budget]
+
+
+def solve_budgets(state: GameState, budgets: list[int]) -> dict[int, tuple[int, list[int], float]]:
+    """
+    Solve the puzzle under several wall budgets from one generated program,
+    which leaves the budget to its limit(b) part.
+    Returns {budget: (score, wall_indices, solve_time)}.
+    """
     if not HAS_CLINGO:
-        return 0, [], 0.0
+        return {budget: (0, [], 0.0) for budget in budgets}
     
     asp_program = generate_asp_program(state)
     
     print(f"    [Clingo] Generated ASP program ({len(asp_program)} chars)")
     
-    # Create control object
+    program_hash = hashlib.blake2b(asp_program.encode(), digest_size=16).digest()
+    
+    results = {}
+    for budget in budgets:
+        results[budget] = solve_ground_program(grounded_control(asp_program, program_hash, budget), state)
+    return results
+
+
+# Clasp solver threads: one per physical core, assuming two hardware threads per
+# core. Parallel search runs a portfolio of differently configured solvers, so
+# which optimal walls come back can vary from run to run (the score doesn't)
+CLINGO_THREADS = max(1, (os.cpu_count() or 1) // 2)
+
+# Grounded Controls of recent (program hash, budget) pairs, least recently used first
+CONTROL_CACHE: OrderedDict = OrderedDict()
+CONTROL_CACHE_SIZE = 4
+
+
+def grounded_control(asp_program: str, program_hash: bytes, budget: int) -> "clingo.Control":
+    """
+    Return a Control with asp_program grounded for budget, reusing a cached one
+    so solving the same puzzle again skips grounding (and keeps clasp's learnt
+    nogoods, which makes repeat solves faster still).
+    """
+    key = (program_hash, budget)
+    ctl = CONTROL_CACHE.get(key)
+    if ctl is not None:
+        CONTROL_CACHE.move_to_end(key)
+        return ctl
+    
+    # A Control per budget rather than multi-shot steps with the budget as an
+    # #external: grounding is a few ms, while a Control kept open for more steps
+    # loses clasp's preprocessing and solved later budgets ~50x slower
     ctl = clingo.Control([
-        "--opt-mode=optN",  # Find optimal
-        "0",  # Find all optimal models
+        # Stop at the first model proven optimal rather than enumerating every
+        # optimal one (optN). The core-guided --opt-strategy=usc was tried too
+        # and solved 7-14x slower than the default branch-and-bound here
+        "--opt-mode=opt",
+        "-t", str(CLINGO_THREADS),
     ])
-    
     ctl.add("base", [], asp_program)
-    ctl.ground([("base", [])])
+    ctl.ground([("base", []), ("limit", [clingo.Number(budget)])])
     
+    CONTROL_CACHE[key] = ctl
+    if len(CONTROL_CACHE) > CONTROL_CACHE_SIZE:
+        CONTROL_CACHE.popitem(last=False)
+    return ctl
+
+
+def solve_ground_program(ctl: "clingo.Control", state: GameState) -> tuple[int, list[int], float]:
+    """Run one solve call on a grounded Control; returns (score, wall_indices, solve_time)."""
     best_walls = []
     best_score = 0
     models_found = 0
@@ -160,91 +238,122 @@ def solve_with_clingo(state: GameState, time_limit: int = 60) -> tuple[int, list
         nonlocal best_walls, best_score, models_found
         models_found += 1
         
-        walls = []
-        for atom in model.symbols(shown=True):
-            if atom.name == "wall":
-                row = atom.arguments[0].number
-                col = atom.arguments[1].number
-                idx = row * state.cols + col
-                walls.append(idx)
-        
-        # Calculate score
-        score = calculate_score(state, walls)
+        # The #maximize objective is the score; clasp reports it negated as a cost,
+        # so no BFS per model and walls are only decoded for improvements
+        score = -model.cost[0] if model.cost else 0
         
         if score > best_score:
+            walls = []
+            for atom in model.symbols(shown=True):
+                if atom.name == "wall":
+                    row = atom.arguments[0].number
+                    col = atom.arguments[1].number
+                    idx = row * state.cols + col
+                    walls.append(idx)
+            
             best_score = score
-            best_walls = walls.copy()
+            best_walls = walls
             print(f"    [Clingo] Model {models_found}: score {score}, walls {len(walls)}")
     
-    ctl.solve(on_model=on_model)
+    # The search space is exhausted once the last model is proven optimal
+    proven = ctl.solve(on_model=on_model).exhausted
     
     solve_time = time.time() - start_time
-    print(f"    [Clingo] Found {models_found} models in {solve_time:.2f}s")
+    print(f"    [Clingo] Found {models_found} models in {solve_time:.2f}s"
+          f"{' (optimum proven)' if proven else ''}")
     
     return best_score, best_walls, solve_time
 
 
-def calculate_score(state: GameState, walls: list[int]) -> int:
-    """Calculate score for given wall placement using BFS."""
-    from collections import deque
-    
-    wall_set = set(walls)
-    
-    # BFS from horse
-    visited = {state.player_idx}
-    queue = deque([state.player_idx])
+@njit(cache=True)
+def flood_fill(terrain, cherries, walls, edge_mask, player_idx, rows, cols, visited, queue):
+    """
+    BFS from the horse over grass that isn't walled. Marks every reached
+    cell in visited (all zeros on entry) and returns (area, cherry_count,
+    escaped), where escaped means the flood touched the border.
+    """
+    visited[player_idx] = 1
+    queue[0] = player_idx
+    head, tail = 0, 1
     escaped = False
-    
-    while queue:
-        current = queue.popleft()
-        
-        row, col = current // state.cols, current % state.cols
-        if row == 0 or row == state.rows - 1 or col == 0 or col == state.cols - 1:
+    cherry_count = 0
+    
+    while head < tail:
+        current = queue[head]
+        head += 1
+        if cherries[current]:
+            cherry_count += 1
+        if edge_mask[current]:
             escaped = True
         
-        # Check neighbors
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nr, nc = row + dr, col + dc
-            if 0 <= nr < state.rows and 0 <= nc < state.cols:
-                neighbor = nr * state.cols + nc
-                if (neighbor not in visited and 
-                    neighbor not in wall_set and 
-                    state.terrain[neighbor] != 1):
-                    visited.add(neighbor)
-                    queue.append(neighbor)
-    
+        row, col = current // cols, current % cols
+        
+        # Neighbors inline: up, down, left, right
+        for neighbor, inside in ((current - cols, row > 0), (current + cols, row < rows - 1),
+                                 (current - 1, col > 0), (current + 1, col < cols - 1)):
+            if inside and not visited[neighbor] and not walls[neighbor] and terrain[neighbor] != 1:
+                visited[neighbor] = 1
+                queue[tail] = neighbor
+                tail += 1
+    
+    return tail, cherry_count, escaped
+
+
+def flood_bits(state: GameState, wall_mask: bytearray) -> tuple[bytearray, int, int, bool]:
+    """
+    flood() without numba: the flood is a packed int (see GameState) grown by
+    a whole BFS layer per step - shifts by one cell for east/west, masked so
+    rows don't wrap, and by one row for north/south - until it stops growing.
+    """
+    open_bits = state.grass_bits & ~int.from_bytes(wall_mask, 'little')
+    not_first_col, not_last_col = state.not_first_col, state.not_last_col
+    row_shift = 8 * state.cols
+    
+    flooded = 1 << 8 * state.player_idx
+    while True:
+        grown = (flooded | (flooded << 8) & not_first_col | (flooded >> 8) & not_last_col
+                 | flooded << row_shift | flooded >> row_shift) & open_bits
+        if grown == flooded:
+            break
+        flooded = grown
+    
+    visited = bytearray(flooded.to_bytes(len(wall_mask), 'little'))
+    return (visited, flooded.bit_count(), (flooded & state.cherry_bits).bit_count(),
+            bool(flooded & state.edge_bits))
+
+
+def make_wall_mask(state: GameState, walls: list[int]) -> bytearray:
+    """Wall indices -> per-cell bytearray, 1 = wall."""
+    wall_mask = bytearray(len(state.terrain))
+    for idx in walls:
+        wall_mask[idx] = 1
+    return wall_mask
+
+
+def flood(state: GameState, wall_mask: bytearray) -> tuple[bytearray, int, int, bool]:
+    """Flood from the horse with wall_mask's walls placed; returns (visited mask, area, cherry_count, escaped)."""
+    n = len(state.terrain)
+    if not HAS_NUMBA:
+        return flood_bits(state, wall_mask)
+    visited = bytearray(n)
+    area, cherry_count, escaped = flood_fill(state.terrain, state.cherries, wall_mask, state.edge_mask,
+                                             state.player_idx, state.rows, state.cols,
+                                             visited, state.queue)
+    return visited, area, cherry_count, escaped
+
+
+def calculate_score(state: GameState, walls: list[int]) -> int:
+    """Calculate score for given wall placement using BFS."""
+    _, area, cherry_count, escaped = flood(state, make_wall_mask(state, walls))
     if escaped:
         return 0
-    
-    # Calculate score
-    area = len(visited)
-    cherry_bonus = sum(3 for c in visited if state.cherries[c])
-    return area + cherry_bonus
+    return area + 3 * cherry_count
 
 
 def visualize_solution(state: GameState, walls: list[int]) -> str:
     """Visualize the solution."""
-    from collections import deque
-    
-    wall_set = set(walls)
-    
-    # BFS to find enclosed area
-    visited = {state.player_idx}
-    queue = deque([state.player_idx])
-    
-    while queue:
-        current = queue.popleft()
-        row, col = current // state.cols, current % state.cols
-        
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nr, nc = row + dr, col + dc
-            if 0 <= nr < state.rows and 0 <= nc < state.cols:
-                neighbor = nr * state.cols + nc
-                if (neighbor not in visited and 
-                    neighbor not in wall_set and 
-                    state.terrain[neighbor] != 1):
-                    visited.add(neighbor)
-                    queue.append(neighbor)
+    wall_mask = make_wall_mask(state, walls)
+    visited, _, _, _ = flood(state, wall_mask)
     
     lines = []
     for row in range(state.rows):
@@ -253,13 +362,13 @@ def visualize_solution(state: GameState, walls: list[int]) -> str:
             idx = row * state.cols + col
             if idx == state.player_idx:
                 line += "H"
-            elif idx in wall_set:
+            elif wall_mask[idx]:
                 line += "#"
             elif state.terrain[idx] == 1:
                 line += "~"
             elif state.cherries[idx]:
-                line += "©" if idx in visited else "C"
-            elif idx in visited:
+                line += "©" if visited[idx] else "C"
+            elif visited[idx]:
                 line += "·"
             else:
                 line += "."
@@ -267,14 +376,19 @@ def visualize_solution(state: GameState, walls: list[int]) -> str:
     return "\n".join(lines)
 
 
+# Shared so the puzzle and its stats (and any further dates) reuse one keep-alive connection
+session = requests.Session()
+session.headers['Accept'] = 'application/json'
+
+
 def fetch_daily_puzzle(date: str) -> dict:
-    response = requests.get(f"https://enclose.horse/api/daily/{date}")
+    response = session.get(f"https://enclose.horse/api/daily/{date}", timeout=10)
     response.raise_for_status()
     return response.json()
 
 
 def get_optimal_solution(level_id: str) -> tuple[int, list[int]]:
-    response = requests.get(f"https://enclose.horse/api/levels/{level_id}/stats")
+    response = session.get(f"https://enclose.horse/api/levels/{level_id}/stats", timeout=10)
     stats = response.json()
     return stats.get('optimalScore', 0), stats.get('optimalWalls', [])
 